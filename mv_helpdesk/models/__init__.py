@@ -3,3 +3,6 @@ from . import helpdesk_ticket_product_moves
 from . import helpdesk_team
 from . import helpdesk_ticket_type
 from . import helpdesk_ticket
+from . import stock_lot
+from . import stock_move_line
+from . import helpdesk_activation_registry
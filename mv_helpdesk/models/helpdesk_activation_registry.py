@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, fields, models, _
+
+from odoo.addons.mv_helpdesk.models.helpdesk_ticket import (
+    SUB_DEALER_CODE,
+    END_USER_CODE,
+)
+
+_logger = logging.getLogger(__name__)
+
+
+class HelpdeskActivationRegistry(models.Model):
+    """
+    One row per code (QR-Code or Lot/Serial Number) of a Stock Move Line, with its
+    Sub-Dealer and End-User activations, so that scanned codes are validated with a
+    single indexed lookup.
+    """
+
+    _name = "mv.helpdesk.activation.registry"
+    _description = _("Warranty Activation Registry")
+    _rec_name = "code"
+    _log_access = False
+
+    code = fields.Char(required=True, index=True, readonly=True)
+    code_type = fields.Selection(
+        [("qr_code", "QR-Code"), ("lot_name", "Lot/Serial Number")],
+        required=True,
+        readonly=True,
+    )
+    stock_move_line_id = fields.Many2one(
+        "stock.move.line", required=True, readonly=True, index=True, ondelete="cascade"
+    )
+    sub_dealer_activation_id = fields.Many2one(
+        "mv.helpdesk.ticket.product.moves",
+        readonly=True,
+        index="btree_not_null",
+        ondelete="set null",
+    )
+    end_user_activation_id = fields.Many2one(
+        "mv.helpdesk.ticket.product.moves",
+        readonly=True,
+        index="btree_not_null",
+        ondelete="set null",
+    )
+
+    _sql_constraints = [
+        (
+            "code_move_line_uniq",
+            "UNIQUE(code, code_type, stock_move_line_id)",
+            "A code can only be registered once by Stock Move Line!",
+        )
+    ]
+
+    def init(self):
+        # Backfill the registry from the existing move lines and activations, once:
+        # afterwards it is kept up to date by the move lines and the activations
+        self._cr.execute("SELECT 1 FROM mv_helpdesk_activation_registry LIMIT 1")
+        if self._cr.fetchone():
+            return
+        self._register_move_lines()
+        self._refresh_activations()
+
+    # ==================================
+    # BUSINESS Methods
+    # ==================================
+
+    @api.model
+    def _register_move_lines(self, move_line_ids=None):
+        """
+            (Re)registers the QR-Codes and Lot/Serial Numbers of the move lines.
+        :param move_line_ids: A list of stock.move.line ids, all move lines if None
+        :return: The registered codes
+        """
+        params = {"move_line_ids": list(move_line_ids or [])}
+        move_line_clause = "AND sml.id = ANY(%(move_line_ids)s)"
+        if move_line_ids is None:
+            move_line_clause = ""
+        else:
+            if not move_line_ids:
+                return []
+            self._cr.execute(
+                """
+                DELETE FROM mv_helpdesk_activation_registry
+                WHERE stock_move_line_id = ANY(%(move_line_ids)s);
+                """,
+                params,
+            )
+
+        self._cr.execute(
+            f"""
+            INSERT INTO mv_helpdesk_activation_registry (code, code_type, stock_move_line_id)
+            SELECT sml.qr_code, 'qr_code', sml.id
+            FROM stock_move_line sml
+            WHERE sml.is_specify_qrcode
+              AND sml.qr_code IS NOT NULL
+              {move_line_clause}
+            UNION ALL
+            SELECT lot.name, 'lot_name', sml.id
+            FROM stock_move_line sml
+                JOIN stock_lot lot ON lot.id = sml.lot_id
+            WHERE lot.name IS NOT NULL
+              {move_line_clause}
+            ON CONFLICT DO NOTHING
+            RETURNING code;
+            """,
+            params,
+        )
+        return list({code for (code,) in self._cr.fetchall()})
+
+    @api.model
+    def _refresh_activations(self, codes=None):
+        """
+            Links the codes to their first Sub-Dealer and End-User activations.
+        :param codes: A list of codes, all codes if None
+        """
+        if codes is not None and not codes:
+            return
+
+        self.env["mv.helpdesk.ticket.product.moves"].flush_model(
+            ["helpdesk_ticket_id", "helpdesk_ticket_type_id", "stock_move_line_id"]
+        )
+        self.flush_model()
+        activation_query = """
+            SELECT tpm.id
+            FROM mv_helpdesk_ticket_product_moves tpm
+                JOIN helpdesk_ticket_type tt ON tt.id = tpm.helpdesk_ticket_type_id
+            WHERE tpm.helpdesk_ticket_id IS NOT NULL
+              AND tt.code = %({type_code})s
+              AND tpm.stock_move_line_id IN (SELECT r2.stock_move_line_id
+                                             FROM mv_helpdesk_activation_registry r2
+                                             WHERE r2.code = r.code
+                                               AND r2.code_type = r.code_type)
+            ORDER BY tpm.id
+            LIMIT 1
+        """
+        # Only the rows whose activations changed are written
+        self._cr.execute(
+            f"""
+            UPDATE mv_helpdesk_activation_registry reg
+            SET sub_dealer_activation_id = act.sub_dealer_activation_id,
+                end_user_activation_id = act.end_user_activation_id
+            FROM (SELECT r.id,
+                         ({activation_query.format(type_code="sub_dealer")}) AS sub_dealer_activation_id,
+                         ({activation_query.format(type_code="end_user")}) AS end_user_activation_id
+                  FROM mv_helpdesk_activation_registry r
+                  WHERE {"TRUE" if codes is None else "r.code = ANY(%(codes)s)"}) act
+            WHERE reg.id = act.id
+              AND (reg.sub_dealer_activation_id, reg.end_user_activation_id)
+                  IS DISTINCT FROM (act.sub_dealer_activation_id, act.end_user_activation_id);
+            """,
+            {
+                "sub_dealer": SUB_DEALER_CODE,
+                "end_user": END_USER_CODE,
+                "codes": list(codes or []),
+            },
+        )
+        self.invalidate_model(["sub_dealer_activation_id", "end_user_activation_id"])
+
+    @api.model
+    def _refresh_move_line_activations(self, move_line_ids):
+        """
+            Refreshes the activations of the codes registered by the move lines.
+        """
+        if not move_line_ids:
+            return
+
+        self.flush_model()
+        self._cr.execute(
+            """
+            SELECT DISTINCT code
+            FROM mv_helpdesk_activation_registry
+            WHERE stock_move_line_id = ANY(%s);
+            """,
+            [list(move_line_ids)],
+        )
+        self._refresh_activations([code for (code,) in self._cr.fetchall()])
+
+    @api.model
+    def _get_registered_move_line_ids(self, move_line_ids):
+        """:return: The ids among move_line_ids which have codes in the registry"""
+        if not move_line_ids:
+            return []
+
+        self.flush_model(["stock_move_line_id"])
+        self._cr.execute(
+            """
+            SELECT DISTINCT stock_move_line_id
+            FROM mv_helpdesk_activation_registry
+            WHERE stock_move_line_id = ANY(%s);
+            """,
+            [list(move_line_ids)],
+        )
+        return [move_line_id for (move_line_id,) in self._cr.fetchall()]
+
+    @api.model
+    def _lookup(self, codes):
+        """
+            Fetches the registry rows of the codes with their activations in one query.
+        :param codes: A list of codes (QR-Codes or Lot/Serial Numbers)
+        :return: A list of dict
+        """
+        if not codes:
+            return []
+
+        self.flush_model()
+        self._cr.execute(
+            """
+            SELECT r.code,
+                   r.code_type,
+                   r.stock_move_line_id,
+                   r.sub_dealer_activation_id,
+                   sd.helpdesk_ticket_id AS sub_dealer_ticket_id,
+                   sd.partner_id         AS sub_dealer_partner_id,
+                   r.end_user_activation_id,
+                   eu.helpdesk_ticket_id AS end_user_ticket_id,
+                   eu.partner_id         AS end_user_partner_id
+            FROM mv_helpdesk_activation_registry r
+                LEFT JOIN mv_helpdesk_ticket_product_moves sd ON sd.id = r.sub_dealer_activation_id
+                LEFT JOIN mv_helpdesk_ticket_product_moves eu ON eu.id = r.end_user_activation_id
+            WHERE r.code = ANY(%s);
+            """,
+            [list(codes)],
+        )
+        return self._cr.dictfetchall()
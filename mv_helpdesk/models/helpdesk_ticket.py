@@ -157,8 +157,8 @@ class HelpdeskTicket(models.Model):
                 vals["partner_id"] = partner.id
         tickets = super(HelpdeskTicket, self).create(vals_list)
 
-        for ticket in tickets:
-            self._process_ticket(ticket, vals_list)
+        for ticket, vals in zip(tickets, vals_list):
+            self._process_ticket(ticket, vals)
 
         return tickets
 
@@ -208,63 +208,70 @@ class HelpdeskTicket(models.Model):
             return [str(code) for code in codes if isinstance(code, (int, str))]
         return []
 
-    def _validate_qr_code(self, codes):
+    @staticmethod
+    def _format_codes(codes):
+        if isinstance(codes, str):
+            return [code.strip() for code in codes.split(",") if code]
+        elif isinstance(codes, list):
+            return [str(code) for code in codes if isinstance(code, (int, str))]
+        return []
+
+    def _lookup_activation_registry(self, codes):
+        """
+        Fetch the Warranty Activation Registry rows of the input codes in one query.
+        """
+        return (
+            self.env["mv.helpdesk.activation.registry"]
+            .sudo()
+            ._lookup(self._format_codes(codes))
+        )
+
+    def _validate_qr_code(self, codes, registry_rows=None):
         """
         Validate the input codes against existing QR codes.
         If the input is a string, split it into a list of codes.
         If the input is already a list, use it directly.
         Return the list of validated QR codes.
         """
-        if isinstance(codes, str):
-            valid_codes = [code.strip() for code in codes.split(",") if code]
-        elif isinstance(codes, list):
-            valid_codes = [str(code) for code in codes if isinstance(code, (int, str))]
-        else:
-            valid_codes = []
-
-        return self.env["stock.move.line"].search(
-            [("qr_code", "in", valid_codes), ("is_specify_qrcode", "=", True)]
+        if registry_rows is None:
+            registry_rows = self._lookup_activation_registry(codes)
+        return self.env["stock.move.line"].browse(
+            row["stock_move_line_id"]
+            for row in registry_rows
+            if row["code_type"] == "qr_code"
         )
 
-    def _validate_lot_serial_number(self, codes):
+    def _validate_lot_serial_number(self, codes, registry_rows=None):
         """
         Validate the input codes against existing lot serial numbers.
         If the input is a string, split it into a list of codes.
         If the input is already a list, use it directly.
         Return the list of validated lot serial numbers.
         """
-        if isinstance(codes, str):
-            valid_codes = [code.strip() for code in codes.split(",") if code]
-        elif isinstance(codes, list):
-            valid_codes = [str(code) for code in codes if isinstance(code, (int, str))]
-        else:
-            valid_codes = []
-
-        stock_lot_serial_number = self.env["stock.lot"].search(
-            [("name", "in", valid_codes)]
-        )
-        return self.env["stock.move.line"].search(
-            [("lot_id", "in", stock_lot_serial_number.ids), ("lot_name", "!=", False)]
+        if registry_rows is None:
+            registry_rows = self._lookup_activation_registry(codes)
+        return self.env["stock.move.line"].browse(
+            row["stock_move_line_id"]
+            for row in registry_rows
+            if row["code_type"] == "lot_name"
         )
 
-    def _process_ticket(self, ticket, vals_list):
-        for vals in vals_list:
-            if vals.get("name") == "new":
-                ticket._compute_name()
+    def _process_ticket(self, ticket, vals):
+        if vals.get("name") == "new":
+            ticket._compute_name()
 
-            if "portal_lot_serial_number" in vals and vals.get(
-                "portal_lot_serial_number"
-            ):
-                barcode = vals["portal_lot_serial_number"]
-                ticket_type = ticket.ticket_type_id
-                self._process_ticket_barcode(ticket, ticket_type, barcode)
+        if vals.get("portal_lot_serial_number"):
+            barcode = vals["portal_lot_serial_number"]
+            ticket_type = ticket.ticket_type_id
+            self._process_ticket_barcode(ticket, ticket_type, barcode)
 
         ticket.clean_data()
 
     def _process_ticket_barcode(self, ticket, ticket_type, barcode):
         res_ids = self._scanning(ticket, ticket_type, barcode)
-        for move_line in self.env["stock.move.line"].browse(res_ids):
-            self._registering_ticket_product_move(ticket, ticket_type, move_line)
+        self._registering_ticket_product_moves(
+            ticket, ticket_type, self.env["stock.move.line"].browse(res_ids)
+        )
 
     def _scanning(self, ticket, ticket_type, codes):
         """
@@ -296,37 +303,45 @@ class HelpdeskTicket(models.Model):
 
         return res
 
-    def _registering_ticket_product_move(self, ticket, ticket_type, stock_move_line):
+    def _registering_ticket_product_moves(self, ticket, ticket_type, stock_move_lines):
         ticket_product_moves_env = self.env["mv.helpdesk.ticket.product.moves"].sudo()
+        if not stock_move_lines:
+            return ticket_product_moves_env
+
+        # [>] Product moves not registered on any ticket yet are removed instead
         existing_product_none_registered = ticket_product_moves_env.search(
             [
                 ("helpdesk_ticket_id", "=", False),
-                ("stock_move_line_id", "=", stock_move_line.id),
-            ],
-            limit=1,
+                ("stock_move_line_id", "in", stock_move_lines.ids),
+            ]
         )
-
-        if existing_product_none_registered:
-            existing_product_none_registered.unlink()
+        move_lines_to_register = (
+            stock_move_lines - existing_product_none_registered.stock_move_line_id
+        )
+        existing_product_none_registered.unlink()
+
+        if ticket_type.code == END_USER_CODE:
+            activation_vals = {
+                "customer_phone_activation": ticket.tel_activation,
+                "customer_date_activation": fields.Date.today(),
+                "customer_license_plates_activation": ticket.license_plates,
+                "customer_mileage_activation": ticket.mileage,
+            }
+        elif ticket_type.code == SUB_DEALER_CODE:
+            activation_vals = {}
         else:
-            if ticket_type.code == END_USER_CODE:
-                ticket_product_moves_env.create(
-                    {
-                        "helpdesk_ticket_id": ticket.id,
-                        "stock_move_line_id": stock_move_line.id,
-                        "customer_phone_activation": ticket.tel_activation,
-                        "customer_date_activation": fields.Date.today(),
-                        "customer_license_plates_activation": ticket.license_plates,
-                        "customer_mileage_activation": ticket.mileage,
-                    }
-                )
-            elif ticket_type.code == SUB_DEALER_CODE:
-                ticket_product_moves_env.create(
-                    {
-                        "helpdesk_ticket_id": ticket.id,
-                        "stock_move_line_id": stock_move_line.id,
-                    }
+            return ticket_product_moves_env
+
+        return ticket_product_moves_env.create(
+            [
+                dict(
+                    activation_vals,
+                    helpdesk_ticket_id=ticket.id,
+                    stock_move_line_id=stock_move_line.id,
                 )
+                for stock_move_line in move_lines_to_register
+            ]
+        )
 
     def _prepare_validated_data(self, ticket, ticket_type, codes):
         """
@@ -346,8 +361,12 @@ class HelpdeskTicket(models.Model):
                 )
             )
 
-        validated_qr_code = self._validate_qr_code(codes)
-        validated_lot_serial_number = self._validate_lot_serial_number(codes)
+        # [>] One lookup in the Warranty Activation Registry for all the codes
+        registry_rows = self._lookup_activation_registry(codes)
+        validated_qr_code = self._validate_qr_code(codes, registry_rows)
+        validated_lot_serial_number = self._validate_lot_serial_number(
+            codes, registry_rows
+        )
 
         # [!] ===== Validate codes are not found on system =====
         if codes and not validated_qr_code and not validated_lot_serial_number:
@@ -359,23 +378,14 @@ class HelpdeskTicket(models.Model):
             )
 
         # [!] ===== Validate codes has been registered on other tickets =====
-        qr_codes = list(set(validated_qr_code.mapped("qr_code")))
-        lot_serial_numbers = list(set(validated_lot_serial_number.mapped("lot_name")))
-
-        # QR-Codes VALIDATION
-        if qr_codes:
+        registered_codes = list({row["code"] for row in registry_rows})
+        if registered_codes:
             self._validate_codes(
-                qr_codes, ticket_type, ticket.partner_id, error_messages, "qr_code"
-            )
-
-        # Lot/Serial Number VALIDATION
-        if lot_serial_numbers:
-            self._validate_codes(
-                lot_serial_numbers,
+                registered_codes,
                 ticket_type,
                 ticket.partner_id,
                 error_messages,
-                "lot_name",
+                registry_rows,
             )
 
         # Merge the results and remove duplicates by using a set
@@ -388,16 +398,34 @@ class HelpdeskTicket(models.Model):
 
         return results, error_messages
 
-    def _validate_codes(self, codes, ticket_type, partner, error_messages, field_name):
+    def _validate_codes(
+        self, codes, ticket_type, partner, error_messages, registry_rows
+    ):
         TicketProductMoves = self.env["mv.helpdesk.ticket.product.moves"].sudo()
 
-        for code in codes:
-            conflicting_ticket_sub_dealer = TicketProductMoves.search(
-                self._get_domain(SUB_DEALER_CODE, code, field_name), limit=1
-            )
-            conflicting_ticket_end_user = TicketProductMoves.search(
-                self._get_domain(END_USER_CODE, code, field_name), limit=1
+        # Sub-Dealer and End-User activations by code, read from the registry rows
+        activations = {}
+        for row in registry_rows:
+            sub_dealer_id, end_user_id = activations.get(row["code"], (False, False))
+            activations[row["code"]] = (
+                sub_dealer_id or row["sub_dealer_activation_id"],
+                end_user_id or row["end_user_activation_id"],
             )
+        prefetch_ids = [
+            activation_id
+            for activation_ids in activations.values()
+            for activation_id in activation_ids
+            if activation_id
+        ]
+
+        for code in codes:
+            sub_dealer_id, end_user_id = activations.get(code, (False, False))
+            conflicting_ticket_sub_dealer = TicketProductMoves.browse(
+                sub_dealer_id
+            ).with_prefetch(prefetch_ids)
+            conflicting_ticket_end_user = TicketProductMoves.browse(
+                end_user_id
+            ).with_prefetch(prefetch_ids)
 
             if (
                 len(conflicting_ticket_sub_dealer) > 0
@@ -420,13 +448,6 @@ class HelpdeskTicket(models.Model):
                         ticket_type.code,
                     )
 
-    def _get_domain(self, ticket_type_code, code, field_name):
-        return [
-            ("helpdesk_ticket_id", "!=", False),
-            ("helpdesk_ticket_type_id.code", "=", ticket_type_code),
-            (f"stock_move_line_id.{field_name}", "=", code),
-        ]
-
     def _handle_code(
         self,
         conflicting_ticket_sub_dealer,
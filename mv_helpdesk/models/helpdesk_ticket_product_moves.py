@@ -106,46 +106,87 @@ class HelpdeskTicketProductMoves(models.Model):
 
     @api.depends("stock_move_id", "lot_name", "qr_code")
     def _compute_product_activate_twice(self):
-        tickets = self.filtered(lambda r: r.helpdesk_ticket_id)
-        if tickets:
-            ticket_activation_same_code = self.env[
-                "mv.helpdesk.ticket.product.moves"
-            ].search(
-                [
-                    ("stock_move_id", "in", tickets.mapped("stock_move_id").ids),
-                    ("lot_name", "in", tickets.mapped("lot_name")),
-                    ("qr_code", "in", tickets.mapped("qr_code")),
-                ]
-            )
-            for record in tickets:
-                ticket_create_date = record.helpdesk_ticket_id.create_date
-                ticket_type_id = record.helpdesk_ticket_type_id.id
-                ticket_stock_move_id = record.stock_move_id.id
-                same_code_ticket = ticket_activation_same_code.filtered(
-                    lambda r: r.stock_move_id.id == ticket_stock_move_id
-                    and r.helpdesk_ticket_type_id.id != ticket_type_id
-                )
-                if (
-                    same_code_ticket
-                    and same_code_ticket.helpdesk_ticket_id.create_date
-                    > ticket_create_date
-                ):
-                    record.product_activate_twice = False
-                    same_code_ticket.product_activate_twice = True
-                elif (
-                    same_code_ticket
-                    and same_code_ticket.helpdesk_ticket_id.create_date
-                    < ticket_create_date
-                ):
-                    record.product_activate_twice = True
-                    same_code_ticket.product_activate_twice = False
-                else:
-                    record.product_activate_twice = False
+        records = self.filtered(lambda r: r.helpdesk_ticket_id)
+        (self - records).product_activate_twice = False
+        if not records:
+            return
+
+        activate_twice = self._get_product_activate_twice(
+            records.stock_move_line_id.ids
+        )
+        # The other activations of the same codes are flagged again as well
+        others = (self.browse(activate_twice) - records).filtered(
+            lambda r: r.product_activate_twice != activate_twice[r.id]
+        )
+        for record in records | others:
+            record.product_activate_twice = activate_twice.get(record.id, False)
+
+    @api.model
+    def _query_product_activate_twice(self, move_line_ids=None):
+        """
+            Flags the activations made after an activation of another ticket type for the
+            same code (stock move line), ordered by the creation of the tickets.
+        :param move_line_ids: Restrict to these stock move lines, all of them when None
+        :return: The query selecting (id, product_activate_twice)
+        """
+        self.flush_model(
+            ["helpdesk_ticket_id", "helpdesk_ticket_type_id", "stock_move_line_id"]
+        )
+        self.env["helpdesk.ticket"].flush_model(["create_date"])
+        move_line_clause = (
+            "AND tpm.stock_move_line_id = ANY(%(move_line_ids)s)"
+            if move_line_ids is not None
+            else ""
+        )
+        return f"""
+            SELECT id,
+                   COALESCE(prev_min_type_id <> helpdesk_ticket_type_id
+                                OR prev_max_type_id <> helpdesk_ticket_type_id,
+                            FALSE) AS product_activate_twice
+            FROM (SELECT tpm.id,
+                         tpm.helpdesk_ticket_type_id,
+                         MIN(tpm.helpdesk_ticket_type_id) OVER w AS prev_min_type_id,
+                         MAX(tpm.helpdesk_ticket_type_id) OVER w AS prev_max_type_id
+                  FROM mv_helpdesk_ticket_product_moves tpm
+                           JOIN helpdesk_ticket ticket ON ticket.id = tpm.helpdesk_ticket_id
+                  WHERE tpm.stock_move_line_id IS NOT NULL
+                    {move_line_clause}
+                  WINDOW w AS (PARTITION BY tpm.stock_move_line_id
+                               ORDER BY ticket.create_date, tpm.id
+                               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)) activations
+        """
+
+    @api.model
+    def _get_product_activate_twice(self, move_line_ids):
+        """:return: A dict {product_move_id: product_activate_twice}"""
+        if not move_line_ids:
+            return {}
+
+        self._cr.execute(
+            self._query_product_activate_twice(move_line_ids),
+            {"move_line_ids": list(move_line_ids)},
+        )
+        return dict(self._cr.fetchall())
 
     # ==================================
     # ORM / CRUD Methods
     # ==================================
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(HelpdeskTicketProductMoves, self).create(vals_list)
+        records._refresh_activation_registry(records.stock_move_line_id.ids)
+        return records
+
+    def write(self, vals):
+        move_line_ids = self.stock_move_line_id.ids
+        res = super(HelpdeskTicketProductMoves, self).write(vals)
+        if {"helpdesk_ticket_id", "stock_move_line_id"} & set(vals):
+            self._refresh_activation_registry(
+                move_line_ids + self.stock_move_line_id.ids
+            )
+        return res
+
     def unlink(self):
         NEW_STATE = "New"
         NOT_ASSIGNED_ERROR = (
@@ -165,7 +206,16 @@ class HelpdeskTicketProductMoves(models.Model):
             ):
                 raise ValidationError(_(NOT_NEW_STATE_ERROR))
 
-        return super(HelpdeskTicketProductMoves, self).unlink()
+        move_line_ids = self.stock_move_line_id.ids
+        res = super(HelpdeskTicketProductMoves, self).unlink()
+        self._refresh_activation_registry(move_line_ids)
+        return res
+
+    def _refresh_activation_registry(self, move_line_ids):
+        self.flush_model()
+        self.env["mv.helpdesk.activation.registry"].sudo()._refresh_move_line_activations(
+            move_line_ids
+        )
 
     # ==================================
     # ACTION / BUTTON ACTION Methods
@@ -194,6 +244,27 @@ class HelpdeskTicketProductMoves(models.Model):
             except Exception as e:
                 _logger.error(f"Failed to reload data for line {line.id}: {e}")
 
+    @api.model
+    def action_recompute_product_activate_twice(self):
+        """Maintenance: Recompute the "Activate Twice" flag over the full table"""
+        if not self.env.is_admin():
+            raise AccessError(_("Only administrators can run this action!"))
+
+        self._cr.execute(
+            f"""
+            UPDATE mv_helpdesk_ticket_product_moves tpm
+            SET product_activate_twice = COALESCE(activations.product_activate_twice, FALSE)
+            FROM mv_helpdesk_ticket_product_moves target
+                     LEFT JOIN ({self._query_product_activate_twice()}) activations
+                               ON activations.id = target.id
+            WHERE target.id = tpm.id
+              AND tpm.product_activate_twice IS DISTINCT FROM
+                  COALESCE(activations.product_activate_twice, FALSE)
+            """
+        )
+        _logger.info("Recomputed product_activate_twice of %s rows", self._cr.rowcount)
+        self.invalidate_model(["product_activate_twice"])
+
     def action_open_stock(self):
         self.ensure_one()
         action = {
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class StockLot(models.Model):
+    _inherit = "stock.lot"
+
+    def write(self, vals):
+        res = super(StockLot, self).write(vals)
+        if "name" in vals:
+            # The Lot/Serial Numbers of the move lines are registered by name
+            self.flush_recordset(["name"])
+            move_lines = (
+                self.env["stock.move.line"].sudo().search([("lot_id", "in", self.ids)])
+            )
+            move_lines._update_activation_registry()
+        return res
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+# Fields of stock.move.line registered in the Warranty Activation Registry,
+# the Lot/Serial Number is the name of the "lot_id"
+ACTIVATION_REGISTRY_FIELDS = {"qr_code", "is_specify_qrcode", "lot_id"}
+
+
+class StockMoveLine(models.Model):
+    _inherit = "stock.move.line"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        move_lines = super(StockMoveLine, self).create(vals_list)
+        move_lines._filter_activation_codes()._update_activation_registry()
+        return move_lines
+
+    def write(self, vals):
+        res = super(StockMoveLine, self).write(vals)
+        if ACTIVATION_REGISTRY_FIELDS & set(vals):
+            # Lines without codes anymore are refreshed to drop their registered codes
+            move_lines = self._filter_activation_codes()
+            move_lines |= self.browse(
+                self.env["mv.helpdesk.activation.registry"]
+                .sudo()
+                ._get_registered_move_line_ids((self - move_lines).ids)
+            )
+            move_lines._update_activation_registry()
+        return res
+
+    def _filter_activation_codes(self):
+        """:return: The move lines with a QR-Code or a Lot/Serial Number to register"""
+        return self.filtered(
+            lambda sml: (sml.is_specify_qrcode and sml.qr_code) or sml.lot_id
+        )
+
+    def _update_activation_registry(self):
+        if not self:
+            return
+
+        self.flush_recordset(list(ACTIVATION_REGISTRY_FIELDS))
+        Registry = self.env["mv.helpdesk.activation.registry"].sudo()
+        Registry._register_move_lines(self.ids)
+        Registry._refresh_move_line_activations(self.ids)
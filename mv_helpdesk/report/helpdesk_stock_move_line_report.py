@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import logging
+
 from odoo import api, fields, models, tools, _
 from odoo.addons.mv_helpdesk.models.helpdesk_ticket import (
     HELPDESK_MANAGER,
@@ -6,6 +8,11 @@ from odoo.addons.mv_helpdesk.models.helpdesk_ticket import (
     END_USER_CODE,
 )
 
+_logger = logging.getLogger(__name__)
+
+# System parameter to back the report by a materialized view (refreshed by cron)
+MATERIALIZED_VIEW_PARAM = "mv_helpdesk.stock_move_line_report_materialized"
+
 
 class HelpdeskStockMoveLineReport(models.Model):
     _name = "mv.helpdesk.stock.move.line.report"
@@ -94,7 +101,8 @@ class HelpdeskStockMoveLineReport(models.Model):
     def _with_clause(self):
         return f"""
             tickets AS ({self._sql_tickets()}),
-            ticket_product_moves AS (SELECT t.*,
+            ticket_product_moves AS (SELECT tp.id                                AS ticket_product_move_id,
+                                                                   t.*,
                                                                    tp.stock_move_line_id,
                                                                    tp.lot_name                         AS serial_number,
                                                                    tp.qr_code                           AS qrcode,
@@ -115,7 +123,7 @@ class HelpdeskStockMoveLineReport(models.Model):
                                 WHERE pp.id IN (SELECT product_id FROM ticket_product_moves)
                                     AND pt.detailed_type = 'product'),
             products_size_lop AS (SELECT pp.id                                          AS product_id,
-                                                             pav_size_lop.name ->> 'en_US'  AS product_att_size_lop
+                                                             STRING_AGG(DISTINCT pav_size_lop.name ->> 'en_US', ', ')  AS product_att_size_lop
                                                 FROM product_product AS pp
                                                     JOIN product_template AS pt 
                                                         ON (pt.id = pp.product_tmpl_id) AND pp.id IN (SELECT product_id FROM ticket_product_moves)
@@ -127,9 +135,9 @@ class HelpdeskStockMoveLineReport(models.Model):
                                                     JOIN product_attribute_value AS pav_size_lop
                                                         ON (pav_size_lop.id = ptav_size_lop.product_attribute_value_id)
                                                 WHERE pp.id IN (SELECT product_id FROM products)
-                                                GROUP BY product_id, product_att_size_lop),
+                                                GROUP BY pp.id),
             products_ma_gai AS (SELECT pp.id                                            AS product_id,
-                                                           pav_ma_gai.name ->> 'en_US'      AS product_att_ma_gai
+                                                           STRING_AGG(DISTINCT pav_ma_gai.name ->> 'en_US', ', ')      AS product_att_ma_gai
                                              FROM product_product AS pp
                                                 JOIN product_template AS pt 
                                                     ON (pt.id = pp.product_tmpl_id) AND pp.id IN (SELECT product_id FROM ticket_product_moves)
@@ -141,12 +149,12 @@ class HelpdeskStockMoveLineReport(models.Model):
                                                 JOIN product_attribute_value AS pav_ma_gai
                                                     ON (pav_ma_gai.id = ptav_ma_gai.product_attribute_value_id)
                                  WHERE pp.id IN (SELECT product_id FROM products)
-                                 GROUP BY product_id, product_att_ma_gai)
+                                 GROUP BY pp.id)
         """
 
     def _select_clause(self):
         return """
-            SELECT ROW_NUMBER() OVER ()               AS id,
+            SELECT t.ticket_product_move_id          AS id,
                           t.*,
                           p.product_barcode                         AS product_barcode,
                           p.product_template_id                    AS product_template_id,
@@ -169,8 +177,64 @@ class HelpdeskStockMoveLineReport(models.Model):
     def _group_by_clause(self):
         return ""
 
+    # ==================================
+    # Materialized View
+    # ==================================
+
+    @api.model
+    def _is_materialized(self):
+        return tools.str2bool(
+            self.env["ir.config_parameter"].sudo().get_param(MATERIALIZED_VIEW_PARAM)
+            or "False"
+        )
+
+    def _drop_view(self):
+        self._cr.execute(
+            "SELECT relkind FROM pg_class WHERE relname = %s", [self._table]
+        )
+        kind = self._cr.fetchone()
+        if kind and kind[0] == "m":
+            self._cr.execute("DROP MATERIALIZED VIEW IF EXISTS %s CASCADE" % self._table)
+        else:
+            tools.drop_view_if_exists(self._cr, self._table)
+
     def init(self):
-        tools.drop_view_if_exists(self._cr, self._table)
+        self._drop_view()
+        if not self._is_materialized():
+            self._cr.execute(
+                "CREATE OR REPLACE VIEW %s AS (%s);" % (self._table, self._query())
+            )
+            return
+
+        self._cr.execute(
+            "CREATE MATERIALIZED VIEW %s AS (%s);" % (self._table, self._query())
+        )
+        # [!] A unique index (one row per ticket/move) is required to refresh concurrently
         self._cr.execute(
-            "CREATE OR REPLACE VIEW %s AS (%s);" % (self._table, self._query())
+            "CREATE UNIQUE INDEX %s_ticket_move_uniq ON %s (id)"
+            % (self._table, self._table)
+        )
+        self._cr.execute(
+            "CREATE INDEX %s_ticket_create_date_index ON %s (ticket_create_date DESC)"
+            % (self._table, self._table)
+        )
+
+    @api.model
+    def _set_materialized(self, materialized=True):
+        """
+            Switches the report between a plain view and a materialized view.
+        """
+        self.env["ir.config_parameter"].sudo().set_param(
+            MATERIALIZED_VIEW_PARAM, str(bool(materialized))
         )
+        self.init()
+
+    @api.model
+    def _cron_refresh_materialized_view(self):
+        if not self._is_materialized():
+            return
+
+        self.env.flush_all()
+        # CONCURRENTLY: the report stays readable while it is refreshed
+        self._cr.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY %s" % self._table)
+        _logger.info("Refreshed materialized view %s", self._table)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.http import Response, content_disposition, request
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class MvComputeDiscountReport(http.Controller):
+
+    @http.route(
+        "/mv_sale/compute_discount/<int:record_id>/xlsx", type="http", auth="user"
+    )
+    def download_compute_discount_xlsx(self, record_id, **kwargs):
+        compute_discount = request.env["mv.compute.discount"].browse(record_id).exists()
+        if not compute_discount:
+            raise request.not_found()
+
+        compute_discount.check_access_rights("read")
+        compute_discount.check_access_rule("read")
+
+        # [>] The workbook is written to a temporary file on disk and streamed by chunks,
+        # the report is never held in the memory of the worker
+        output = tempfile.TemporaryFile()
+        file_name = compute_discount.export_to_excel(output)
+        output.seek(0)
+
+        return Response(
+            wrap_file(request.httprequest.environ, output),
+            headers=[
+                ("Content-Type", XLSX_MIMETYPE),
+                ("Content-Length", os.fstat(output.fileno()).st_size),
+                ("Content-Disposition", content_disposition(file_name)),
+            ],
+            direct_passthrough=True,
+        )
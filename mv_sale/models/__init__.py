@@ -9,11 +9,16 @@ from . import mv_discount
 from . import mv_discount_line
 from . import mv_discount_partner
 from . import mv_discount_warranty
+from . import mv_partner_discount_cron_watermark
+from . import mv_partner_discount_ledger
 from . import mv_promote_discount_line
 from . import mv_white_place_discount_line
 from . import product_attribute
+from . import product_category
+from . import product_product
 from . import product_template
 from . import res_partner
 from . import sale_make_invoice_advance
 from . import sale_order
 from . import sale_order_line
+from . import stock_picking
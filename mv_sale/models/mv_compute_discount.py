@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
-import base64
 import calendar
-import io
+import logging
 from datetime import date, datetime
 
 from dateutil.relativedelta import relativedelta
@@ -15,6 +14,8 @@ from odoo import api, fields, models, _
 from odoo.exceptions import AccessError, UserError
 from odoo.tools.misc import formatLang
 
+_logger = logging.getLogger(__name__)
+
 DEFAULT_SERVER_DATE_FORMAT = "%Y-%m-%d"
 DEFAULT_SERVER_TIME_FORMAT = "%H:%M:%S"
 DEFAULT_SERVER_DATETIME_FORMAT = "%s %s" % (
@@ -150,6 +151,7 @@ class MvComputeDiscount(models.Model):
         try:
             self.ensure_one()
             if self.state != "draft":
+                self._reverse_discount_ledger()
                 self.state = "draft"
         except Exception as e:
             _logger.error("Failed to reset to draft: %s", e)
@@ -157,8 +159,9 @@ class MvComputeDiscount(models.Model):
 
     def action_confirm(self):
         """
-        Confirms the computation of discounts for partners. It performs several operations including filtering and searching for records,
-        and updating the state of the record.
+        Confirms the computation of discounts for partners. The sales of every agency
+        (child contacts rolled up to their parent) are aggregated in one grouped query,
+        then all the discount lines are created in one batch.
 
         Returns:
             None
@@ -167,99 +170,36 @@ class MvComputeDiscount(models.Model):
 
         date_from, date_to = self._get_dates(self.report_date, self.month, self.year)
         self.line_ids = False
-        list_line_ids = []
 
-        # Fetch all sale orders at once
-        sale_orders = self.env["sale.order"].search(
-            [
-                ("is_order_returns", "=", False),
-                ("state", "=", "sale"),
-                ("date_invoice", ">=", date_from),
-                ("date_invoice", "<", date_to),
-            ]
+        # Fetch partners at once
+        partners_use_for_discount = self._get_partner_for_discount_only(
+            self.month, self.year
         )
-
-        if not sale_orders:
+        sales_data = self._fetch_agency_sales_data(
+            date_from, date_to, partners_use_for_discount.ids
+        )
+        if not sales_data:
             raise UserError(
                 _("Hiện tại không có đơn hàng nào đã thanh toán trong tháng %s")
                 % self.month
             )
 
-        # Filter order lines at once with the following conditions:
-        # - Partner is an agency
-        # - Product category is eligible for discount
-        # - Product type is 'product'
-        # - Quantity delivered is greater than 0
-        order_lines = sale_orders.order_line.filtered(
-            lambda order: order.order_id.partner_id.is_agency
-            and order.order_id.check_category_product(order.product_id.categ_id)
-            and order.product_id.detailed_type == "product"
-            and order.qty_delivered > 0
+        partners = self.env["res.partner"].sudo().browse(list(sales_data))
+        previous_lines = self.env["mv.compute.discount.line"]._get_partner_history(
+            partners.ids, int(self.year), int(self.month)
         )
 
-        # Fetch partners at once
-        partners_use_for_discount = self._get_partner_for_discount_only(
-            self.month, self.year
-        )
-        partners = order_lines.order_id.mapped("partner_id").filtered(
-            lambda rec: (
-                rec.id
-                in self.env["res.partner"]
-                .sudo()
-                .browse(partners_use_for_discount.ids)
-                .ids
-                if partners_use_for_discount
-                else []
-            )
-        )
-
-        for partner_id in partners:
-            total_quantity_minimum = 0
-            total_quantity_maximum = 0
-            total_quantity_delivered = 0
-            total_quantity_for_discount = 0
-            total_sales = 0
-            total_discount = 0
-            total_sales_after_discount = 0
-
-            vals = self._prepare_values_for_confirmation(partner_id, self.report_date)
-            partner = self.env["res.partner"].sudo().browse(partner_id.id)
-
-            # [GET] All Orders of Partner
-            order_by_partner_agency = order_lines.filtered(
-                lambda sol: sol.order_id.partner_id == partner
-            )
-            vals["currency_id"] = order_by_partner_agency[0].order_id.currency_id.id
+        vals_list = []
+        for partner in partners:
+            data = sales_data[partner.id]
+            total_quantity_delivered = data["quantity"]
+            total_sales = data["amount_total"]
 
-            # [GET] All Orders of Partner has (parent_id = partner_id)
-            childs_of_partner = self.env["res.partner"].search(
-                [("parent_id", "=", partner.id)]
-            )
-            orders_by_child_of_partner_agency = sale_orders.search(
-                [("partner_id", "in", childs_of_partner.ids)]
-            ).order_line.filtered(
-                lambda sol: sol.order_id.check_category_product(sol.product_id.categ_id)
-                and sol.product_id.detailed_type == "product"
-                and sol.qty_delivered > 0
-            )
-            if orders_by_child_of_partner_agency:
-                order_by_partner_agency += orders_by_child_of_partner_agency
-
-            # [UP] Update Quantity (Get only with [qty_delivered] field)
-            total_quantity_delivered += sum(
-                order_by_partner_agency.filtered(
-                    lambda line: line.price_unit > 0
-                ).mapped("qty_delivered")
-            )
+            vals = self._prepare_values_for_confirmation(partner, self.report_date)
+            vals["parent_id"] = self.id
+            vals["currency_id"] = data["currency_id"]
             vals["quantity"] = total_quantity_delivered
-
-            # [UP] Update Quantity Discount (Get only with [qty_delivered] field)
-            total_quantity_for_discount += sum(
-                order_by_partner_agency.filtered(
-                    lambda line: line.price_unit == 0
-                ).mapped("qty_delivered")
-            )
-            vals["quantity_discount"] = total_quantity_for_discount
+            vals["quantity_discount"] = data["quantity_discount"]
 
             # [!] Determine Partner Discount Level
             line_ids = partner.line_ids.filtered(
@@ -269,148 +209,129 @@ class MvComputeDiscount(models.Model):
                     else not discount.date
                 )
             ).sorted("level")
+            if not line_ids:
+                continue
 
-            if line_ids:
-                compute_discount_line = self.env["mv.compute.discount.line"]
+            # [UP] Update Total Sales
+            vals["amount_total"] = total_sales
 
-                # [UP] Update Total Sales
-                total_sales += sum(
-                    order_by_partner_agency.filtered(
-                        lambda line: line.price_unit > 0
-                    ).mapped("price_subtotal_before_discount")
+            level = line_ids[-1].level
+            discount_id = line_ids[-1].parent_id
+            discount_line_id = discount_id.line_ids.filtered(
+                lambda line: line.level == level
+            )
+            vals["level"] = discount_line_id.level
+            vals["quantity_from"] = discount_line_id.quantity_from
+            vals["quantity_to"] = discount_line_id.quantity_to
+
+            if total_quantity_delivered >= discount_line_id.quantity_from:
+                vals.update(
+                    self._prepare_period_discount_values(
+                        partner, discount_line_id, total_sales, previous_lines
+                    )
                 )
-                vals["amount_total"] = total_sales
 
-                level = line_ids[-1].level
-                discount_id = line_ids[-1].parent_id
-                discount_line_id = discount_id.line_ids.filtered(
-                    lambda line: line.level == level
-                )
-                vals["level"] = discount_line_id.level
-                total_quantity_minimum += discount_line_id.quantity_from
-                vals["quantity_from"] = total_quantity_minimum
-                total_quantity_maximum += discount_line_id.quantity_to
-                vals["quantity_to"] = total_quantity_maximum
-
-                quantity_required_to_discount = (
-                    total_quantity_delivered >= total_quantity_minimum
-                )
-                if quantity_required_to_discount:
-                    # [>] Để đạt được chỉ tiêu 1 tháng => Chỉ cần thỏa số lượng trong tháng
-                    discount_for_a_month = discount_line_id.month
-                    vals["is_month"] = True
-                    vals["month"] = discount_for_a_month
-                    vals["month_money"] = total_sales * discount_for_a_month / 100
-
-                    # [>] Để đạt kết quả 2 tháng:
-                    # 1 - tháng này phải đạt chỉ tiêu tháng
-                    # 2 - tháng trước phải đạt chỉ tiêu tháng và chưa đạt chỉ tiêu 2 tháng
-                    if self.month == "1":
-                        name = "12" + "/" + str(int(self.year) - 1)
-                    else:
-                        name = str(int(self.month) - 1) + "/" + self.year
-
-                    line_two_month_id = compute_discount_line.search(
-                        [
-                            ("partner_id", "=", partner.id),
-                            ("name", "=", name),
-                            ("is_month", "=", True),
-                            ("is_two_month", "=", False),
-                        ]
-                    )
-                    if line_two_month_id:
-                        discount_for_two_month = discount_line_id.two_month
-                        vals["is_two_month"] = True
-                        vals["two_month"] = discount_for_two_month
-                        vals["amount_two_month"] = (
-                            line_two_month_id.amount_total + total_sales
-                        )
-                        vals["two_money"] = (
-                            (line_two_month_id.amount_total + total_sales)
-                            * discount_for_two_month
-                            / 100
-                        )
-
-                    # [>] Để đạt kết quả quý [1, 2, 3] [4, 5, 6] [7, 8, 9] [10, 11, 12]:
-                    # [>] Chỉ xét quý vào các tháng 3 6 9 12, chỉ cần kiểm tra 2 tháng trước đó có đạt chỉ tiêu tháng ko
-                    if self.month in QUARTER_OF_YEAR:
-                        name_one = str(int(self.month) - 1) + "/" + self.year
-                        name_two = str(int(self.month) - 2) + "/" + self.year
-                        line_name_one = compute_discount_line.search(
-                            [
-                                ("partner_id", "=", partner.id),
-                                ("name", "=", name_one),
-                                ("is_month", "=", True),
-                            ]
-                        )
-                        line_name_two = compute_discount_line.search(
-                            [
-                                ("partner_id", "=", partner.id),
-                                ("name", "=", name_two),
-                                ("is_month", "=", True),
-                            ]
-                        )
-                        if line_name_one and line_name_two:
-                            discount_for_two_month = discount_line_id.two_month
-                            discount_for_quarter = discount_line_id.quarter
-                            vals["is_quarter"] = True
-                            vals["quarter"] = discount_for_quarter
-                            vals["quarter_money"] = (
-                                (
-                                    total_sales
-                                    + line_name_one.amount_total
-                                    + line_name_two.amount_total
-                                )
-                                * discount_for_two_month
-                                / 100
-                            )
-
-                    # [>] Để đạt kết quả năm thì tháng đang xét phải là 12
-                    # [>] Kiểm tra 11 tháng trước đó đã được chỉ tiêu tháng chưa
-                    if self.month == DECEMBER:
-                        flag = True
-                        total_year = 0
-                        for i in range(12):
-                            name = str(i + 1) + "/" + self.year
-                            line_name = compute_discount_line.search(
-                                [
-                                    ("partner_id", "=", partner.id),
-                                    ("name", "=", name),
-                                    ("is_month", "=", True),
-                                ]
-                            )
-                            if not line_name:
-                                flag = False
-                            total_year += line_name.amount_total
-
-                        if flag:
-                            discount_for_year = discount_line_id.quarter
-                            vals["is_year"] = True
-                            vals["year"] = discount_for_year
-                            vals["year_money"] = total_year * discount_for_year / 100
-
-                if discount_line_id and discount_line_id.level >= 0:
-                    sale_ids = order_by_partner_agency.order_id.ids
-                    order_line_ids = order_by_partner_agency.ids
-
-                    if orders_by_child_of_partner_agency:
-                        sale_ids += orders_by_child_of_partner_agency.mapped(
-                            "order_id"
-                        ).ids
-                        order_line_ids += orders_by_child_of_partner_agency.ids
-
-                    vals["sale_ids"] = sale_ids
-                    vals["order_line_ids"] = order_line_ids
-                    vals["discount_line_id"] = discount_line_id.id
-
-                list_line_ids.append((0, 0, vals))
-
-        if not list_line_ids:
+            if discount_line_id and discount_line_id.level >= 0:
+                vals["sale_ids"] = data["sale_ids"]
+                vals["order_line_ids"] = data["order_line_ids"]
+                vals["discount_line_id"] = discount_line_id.id
+
+            vals_list.append(vals)
+
+        if not vals_list:
             raise UserError(
                 _("Không có dữ liệu để tính chiết khấu cho tháng %s") % self.month
             )
 
-        self.write({"line_ids": list_line_ids, "state": "confirm"})
+        self.env["mv.compute.discount.line"].create(vals_list)
+        self.write({"state": "confirm"})
+
+    def _prepare_period_discount_values(
+        self, partner, discount_line_id, total_sales, previous_lines
+    ):
+        """
+            Computes the month, 2-month, quarter and year discount values of a partner
+            which reached the monthly target, based on the preloaded previous lines.
+
+        Args:
+            partner (res.partner): The agency.
+            discount_line_id (mv.discount.line): The policy line of the partner's level.
+            total_sales (float): The sales of the agency in the current month.
+            previous_lines (dict): The previous lines by (partner_id, year, month).
+
+        Returns:
+            dict: The values to update on the discount line.
+        """
+        compute_discount_line = self.env["mv.compute.discount.line"]
+        year, month = int(self.year), int(self.month)
+
+        def _get_line(line_year, line_month):
+            return previous_lines.get(
+                (partner.id, line_year, line_month), compute_discount_line
+            ).filtered("is_month")
+
+        # [>] Để đạt được chỉ tiêu 1 tháng => Chỉ cần thỏa số lượng trong tháng
+        discount_for_a_month = discount_line_id.month
+        vals = {
+            "is_month": True,
+            "month": discount_for_a_month,
+            "month_money": total_sales * discount_for_a_month / 100,
+        }
+
+        # [>] Để đạt kết quả 2 tháng:
+        # 1 - tháng này phải đạt chỉ tiêu tháng
+        # 2 - tháng trước phải đạt chỉ tiêu tháng và chưa đạt chỉ tiêu 2 tháng
+        line_two_month_id = _get_line(
+            *compute_discount_line._get_previous_period(year, month)
+        ).filtered(lambda r: not r.is_two_month)
+        if line_two_month_id:
+            discount_for_two_month = discount_line_id.two_month
+            amount_two_month = sum(line_two_month_id.mapped("amount_total"))
+            vals["is_two_month"] = True
+            vals["two_month"] = discount_for_two_month
+            vals["amount_two_month"] = amount_two_month + total_sales
+            vals["two_money"] = (
+                (amount_two_month + total_sales) * discount_for_two_month / 100
+            )
+
+        # [>] Để đạt kết quả quý [1, 2, 3] [4, 5, 6] [7, 8, 9] [10, 11, 12]:
+        # [>] Chỉ xét quý vào các tháng 3 6 9 12, chỉ cần kiểm tra 2 tháng trước đó có đạt chỉ tiêu tháng ko
+        if self.month in QUARTER_OF_YEAR:
+            line_name_one = _get_line(year, month - 1)
+            line_name_two = _get_line(year, month - 2)
+            if line_name_one and line_name_two:
+                discount_for_two_month = discount_line_id.two_month
+                discount_for_quarter = discount_line_id.quarter
+                vals["is_quarter"] = True
+                vals["quarter"] = discount_for_quarter
+                vals["quarter_money"] = (
+                    (
+                        total_sales
+                        + sum(line_name_one.mapped("amount_total"))
+                        + sum(line_name_two.mapped("amount_total"))
+                    )
+                    * discount_for_two_month
+                    / 100
+                )
+
+        # [>] Để đạt kết quả năm thì tháng đang xét phải là 12
+        # [>] Kiểm tra 11 tháng trước đó đã được chỉ tiêu tháng chưa
+        if self.month == DECEMBER:
+            flag = True
+            total_year = 0
+            for i in range(12):
+                line_name = _get_line(year, i + 1)
+                if not line_name:
+                    flag = False
+                total_year += sum(line_name.mapped("amount_total"))
+
+            if flag:
+                discount_for_year = discount_line_id.quarter
+                vals["is_year"] = True
+                vals["year"] = discount_for_year
+                vals["year_money"] = total_year * discount_for_year / 100
+
+        return vals
 
     def _prepare_values_for_confirmation(self, partner_id, report_date):
         """Gets the data and returns it the right format for render."""
@@ -454,16 +375,13 @@ class MvComputeDiscount(models.Model):
 
         for rec in self:
             if rec.line_ids:
-                for discount_line in rec.line_ids:
-                    discount_line.partner_id.write(
-                        {
-                            "amount": discount_line.partner_id.amount
-                            + discount_line.total_money
-                        }
-                    )
+                self.env["mv.partner.discount.ledger"]._credit_compute_discount_lines(
+                    rec.line_ids
+                )
             rec.state = "done"
 
     def action_undo(self):
+        self._reverse_discount_ledger()
         self.write(
             {
                 "state": "draft",
@@ -471,6 +389,16 @@ class MvComputeDiscount(models.Model):
             }
         )
 
+    def _reverse_discount_ledger(self):
+        """
+        Reverses the ledger credits of the approved lines when the computation is undone.
+        """
+        lines = self.filtered(lambda r: r.state == "done").line_ids
+        if lines:
+            self.env["mv.partner.discount.ledger"]._reverse_entries(
+                "compute_discount_line_id", lines
+            )
+
     def action_view_tree(self):
         return {
             "type": "ir.actions.act_window",
@@ -563,6 +491,88 @@ class MvComputeDiscount(models.Model):
             _logger.error("Failed to fetch partners for discount: %s", e)
             return self.env["res.partner"]
 
+    def _fetch_agency_sales_data(self, date_from, date_to, partner_ids):
+        """
+            Aggregates the delivered tyres and sales of the agencies in one grouped query.
+            Orders of child contacts are rolled up to their parent agency.
+
+        Args:
+            date_from (datetime): The start of the period (included).
+            date_to (datetime): The end of the period (excluded).
+            partner_ids (list): The agencies which are eligible for discounts.
+
+        Returns:
+            dict: The aggregated values by agency id.
+        """
+        if not partner_ids:
+            return {}
+
+        self.env["sale.order"].flush_model(
+            ["partner_id", "state", "is_order_returns", "date_invoice", "currency_id"]
+        )
+        self.env["sale.order.line"].flush_model(
+            [
+                "order_id",
+                "product_id",
+                "price_unit",
+                "qty_delivered",
+                "price_subtotal_before_discount",
+            ]
+        )
+        self.env["res.partner"].flush_model(["parent_id", "is_agency"])
+        self.env["product.product"].flush_model(["product_tmpl_id"])
+        self.env["product.template"].flush_model(["categ_id", "detailed_type"])
+        self.env["product.category"].flush_model(["is_tyre_category"])
+        query = """
+            WITH agency_lines AS (
+                SELECT CASE WHEN partner.is_agency THEN partner.id ELSE partner.parent_id END AS agency_id,
+                       so.partner_id                      AS partner_id,
+                       so.id                              AS order_id,
+                       so.currency_id                     AS currency_id,
+                       sol.id                             AS line_id,
+                       sol.price_unit                     AS price_unit,
+                       sol.qty_delivered                  AS qty_delivered,
+                       sol.price_subtotal_before_discount AS price_subtotal_before_discount
+                FROM sale_order_line sol
+                    JOIN sale_order so ON so.id = sol.order_id
+                    JOIN res_partner partner ON partner.id = so.partner_id
+                    JOIN product_product pp ON pp.id = sol.product_id
+                    JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                    JOIN product_category categ ON categ.id = pt.categ_id
+                WHERE so.state = 'sale'
+                    AND (so.is_order_returns IS NULL OR so.is_order_returns = FALSE)
+                    AND so.date_invoice >= %(date_from)s
+                    AND so.date_invoice < %(date_to)s
+                    AND pt.detailed_type = 'product'
+                    AND sol.qty_delivered > 0
+                    AND categ.is_tyre_category
+            )
+            SELECT agency_id,
+                   MIN(currency_id)                                                   AS currency_id,
+                   COALESCE(SUM(qty_delivered) FILTER (WHERE price_unit > 0), 0)::FLOAT
+                                                                                      AS quantity,
+                   COALESCE(SUM(qty_delivered) FILTER (WHERE price_unit = 0), 0)::FLOAT
+                                                                                      AS quantity_discount,
+                   COALESCE(SUM(price_subtotal_before_discount) FILTER (WHERE price_unit > 0), 0)::FLOAT
+                                                                                      AS amount_total,
+                   ARRAY_AGG(DISTINCT order_id)                                       AS sale_ids,
+                   ARRAY_AGG(line_id ORDER BY line_id)                                AS order_line_ids
+            FROM agency_lines
+            WHERE agency_id = ANY(%(partner_ids)s)
+            GROUP BY agency_id
+            HAVING BOOL_OR(partner_id = agency_id)
+            ORDER BY agency_id;
+        """
+        self.env.cr.execute(
+            query,
+            {
+                "date_from": date_from,
+                "date_to": date_to,
+                "partner_ids": list(set(partner_ids)),
+            },
+        )
+        return {data["agency_id"]: data for data in self.env.cr.dictfetchall()}
+
     def _access_approve(self):
         """
             Helps check user security for access to Discount/Discount Line approval
@@ -636,11 +646,19 @@ class MvComputeDiscount(models.Model):
         except ValueError:
             return []
 
-    def _get_compute_discount_detail_data(self, report_date, pass_security=False):
-        report_lines = []
+    def _get_compute_discount_detail_data(
+        self, report_date, pass_security=False, batch_size=1000
+    ):
+        """
+            Yields the detail lines of the computation, fetched in batches through a
+            server-side cursor so that the lines are never loaded all at once.
+        """
+        self.ensure_one()
         self.env["mv.compute.discount.line"].flush_model()
+        cursor_name = "mv_compute_discount_detail_%s" % self.id
         query = """
-            SELECT ROW_NUMBER() OVER ()                    AS row_index,
+            DECLARE {} NO SCROLL CURSOR FOR
+            SELECT ROW_NUMBER() OVER (ORDER BY cdl.id)     AS row_index,
                        partner.name                            AS sub_dealer,
                        cdl.level                               AS level,
                        cdl.quantity_from                       AS quantity_from,
@@ -655,28 +673,38 @@ class MvComputeDiscount(models.Model):
                        cdl.total_money                         AS total_money
             FROM mv_compute_discount_line cdl
                 JOIN res_partner partner ON partner.id = cdl.partner_id
-            WHERE cdl.parent_id = %s;
-        """
+            WHERE cdl.parent_id = %s
+            ORDER BY cdl.id;
+        """.format(cursor_name)
         self.env.cr.execute(query, [self.id])
-        for data in self.env.cr.dictfetchall():
-            report_lines.append(
-                {
-                    "index": data["row_index"],
-                    "partner_id": data["sub_dealer"],
-                    "level": data["level"],
-                    "quantity_from": data["quantity_from"],
-                    "quantity": data["quantity"],
-                    "quantity_discount": data["quantity_discount"],
-                    "amount_total": data["total"],
-                    "amount_month_money": data["month_money"],
-                    "amount_two_money": data["two_money"],
-                    "amount_quarter_money": data["quarter_money"],
-                    "amount_year_money": data["year_money"],
-                    "amount_promote_discount_money": data["promote_discount_money"],
-                    "amount_total_money": data["total_money"],
-                }
-            )
-        return report_lines
+        try:
+            while True:
+                self.env.cr.execute(
+                    "FETCH FORWARD %s FROM {}".format(cursor_name), [batch_size]
+                )
+                rows = self.env.cr.dictfetchall()
+                if not rows:
+                    break
+                for data in rows:
+                    yield {
+                        "index": data["row_index"],
+                        "partner_id": data["sub_dealer"],
+                        "level": data["level"],
+                        "quantity_from": data["quantity_from"],
+                        "quantity": data["quantity"],
+                        "quantity_discount": data["quantity_discount"],
+                        "amount_total": data["total"],
+                        "amount_month_money": data["month_money"],
+                        "amount_two_money": data["two_money"],
+                        "amount_quarter_money": data["quarter_money"],
+                        "amount_year_money": data["year_money"],
+                        "amount_promote_discount_money": data[
+                            "promote_discount_money"
+                        ],
+                        "amount_total_money": data["total_money"],
+                    }
+        finally:
+            self.env.cr.execute("CLOSE {}".format(cursor_name))
 
     def print_report(self):
         months = set(self.mapped("month"))
@@ -684,54 +712,25 @@ class MvComputeDiscount(models.Model):
         if len(months) > 1:
             raise UserError(_("Only export report in ONE MONTH!"))
 
-        # DOWNLOAD Report Data
-        file_content, file_name = self.export_to_excel()
-
-        # REMOVE All Excel Files by file_content:
-        attachments_to_remove = self.env["ir.attachment"].search(
-            [
-                ("res_model", "=", self._name),
-                ("res_id", "=", self.id),
-                ("create_uid", "=", self.env.uid),
-                ("create_date", "<", fields.Datetime.now()),
-                ("name", "ilike", "Moveoplus-Partners-Discount-Detail%"),
-            ]
-        )
-        if attachments_to_remove:
-            attachments_to_remove.unlink()
-
-        # NEW Attachment to download
-        new_attachment = (
-            self.with_context(ats_penalties_fines=True)
-            .env["ir.attachment"]
-            .create(
-                {
-                    "name": file_name,
-                    "description": file_name,
-                    "datas": base64.b64encode(file_content),
-                    "res_model": self._name,
-                    "res_id": self.ids[0],
-                }
-            )
-        )
-
-        if len(new_attachment) == 1:
-            return {
-                "type": "ir.actions.act_url",
-                "url": f"/web/content/{new_attachment[0].id}?download=true",
-                "target": "self",
-            }
-
-        return False
+        # DOWNLOAD Report Data: streamed by the controller, no attachment is stored
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/mv_sale/compute_discount/%s/xlsx" % self.ids[0],
+            "target": "self",
+        }
 
-    def export_to_excel(self):
+    def export_to_excel(self, output):
+        """
+            Writes the report into the file object :param output: in constant memory mode,
+            rows are flushed to disk as soon as they are written.
+        :return: The file name of the report
+        """
         self.ensure_one()
 
         if not self:
             raise UserError(_("No data to generate the report for."))
 
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
         sheet = workbook.add_worksheet()
         file_name = "Moveoplus-Partners-Discount-Detail_%s-%s.xlsx" % (
             self.report_date.month,
@@ -797,60 +796,51 @@ class MvComputeDiscount(models.Model):
             }
         )
 
+        # [!] Constant memory mode flushes a row as soon as the next one is written,
+        # the sub-titles are kept on a single (taller) row instead of merged cells
+        sheet.set_row(1, 30)
+
         # ////// NAME = "Thứ tự"
-        sheet.merge_range("A2:A3", "", DEFAULT_FORMAT)
         sheet.write("A2", "#", SUB_TITLE_FORMAT)
 
         sheet.set_column(1, 0, 3)
 
         # ////// NAME = "Đại lý"
-        sheet.merge_range("B2:B3", "", DEFAULT_FORMAT)
         sheet.write("B2", "Đại lý", SUB_TITLE_FORMAT)
 
         sheet.set_column(1, 1, 70)
 
         # ////// NAME = "Cấp bậc"
-        sheet.merge_range("C2:C3", "", DEFAULT_FORMAT)
         sheet.write("C2", "Cấp bậc", SUB_TITLE_FORMAT)
 
         # ////// NAME = "24TA"
-        sheet.merge_range("D2:D3", "", DEFAULT_FORMAT)
         sheet.write("D2", "24TA", SUB_TITLE_FORMAT)
 
         # ////// NAME = "Số lượng lốp đã bán (Cái)"
-        sheet.merge_range("E2:E3", "", DEFAULT_FORMAT)
         sheet.write("E2", "SL lốp đã bán (Cái)", SUB_TITLE_FORMAT)
 
         # ////// NAME = "Số lượng lốp Khuyến Mãi (Cái)"
-        sheet.merge_range("F2:F3", "", DEFAULT_FORMAT)
         sheet.write("F2", "SL lốp khuyến mãi (Cái)", SUB_TITLE_FORMAT)
 
         # ////// NAME = "Doanh thu Tháng"
-        sheet.merge_range("G2:G3", "", DEFAULT_FORMAT)
         sheet.write("G2", "Doanh thu", SUB_TITLE_TOTAL_FORMAT)
 
         # ////// NAME = "Số tiền chiết khấu tháng"
-        sheet.merge_range("H2:H3", "", DEFAULT_FORMAT)
         sheet.write("H2", "Tiền CK Tháng", SUB_TITLE_TOTAL_FORMAT)
 
         # ////// NAME = "Số tiền chiết khấu 2 tháng"
-        sheet.merge_range("I2:I3", "", DEFAULT_FORMAT)
         sheet.write("I2", "Tiền CK 2 Tháng", SUB_TITLE_TOTAL_FORMAT)
 
         # ////// NAME = "Số tiền chiết khấu quý"
-        sheet.merge_range("J2:J3", "", DEFAULT_FORMAT)
         sheet.write("J2", "Tiền CK Quý", SUB_TITLE_TOTAL_FORMAT)
 
         # ////// NAME = "Số tiền chiết khấu năm"
-        sheet.merge_range("K2:K3", "", DEFAULT_FORMAT)
         sheet.write("K2", "Tiền CK Năm", SUB_TITLE_TOTAL_FORMAT)
 
         # ////// NAME = "Số tiền chiết khấu khuyến khích"
-        sheet.merge_range("L2:L3", "", DEFAULT_FORMAT)
         sheet.write("L2", "Tiền CK Khuyến Khích", SUB_TITLE_TOTAL_FORMAT)
 
         # ////// NAME = "Tổng tiền chiết khấu"
-        sheet.merge_range("M2:M3", "", DEFAULT_FORMAT)
         sheet.write("M2", "Tổng tiền", SUB_TITLE_TOTAL_FORMAT)
 
         sheet.set_column(4, 12, 15)
@@ -887,8 +877,22 @@ class MvComputeDiscount(models.Model):
             }
         )
 
-        column_headers = list(data_lines[0].keys())
-        for count, data in enumerate(data_lines, start=3):
+        column_headers = [
+            "index",
+            "partner_id",
+            "level",
+            "quantity_from",
+            "quantity",
+            "quantity_discount",
+            "amount_total",
+            "amount_month_money",
+            "amount_two_money",
+            "amount_quarter_money",
+            "amount_year_money",
+            "amount_promote_discount_money",
+            "amount_total_money",
+        ]
+        for count, data in enumerate(data_lines, start=2):
             for col, key in enumerate(column_headers):
                 if isinstance(data[key], str):
                     sheet.write(count, col, data[key], BODY_CHAR_FORMAT)
@@ -903,6 +907,5 @@ class MvComputeDiscount(models.Model):
         # ############# [FOOTER] ###########################################
 
         workbook.close()
-        output.seek(0)
 
-        return output.read(), file_name.replace("-", "_")
+        return file_name.replace("-", "_")
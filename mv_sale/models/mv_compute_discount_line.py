@@ -4,6 +4,7 @@ from markupsafe import Markup
 from odoo import _, api, fields, models
 from odoo.exceptions import AccessError
 from odoo.tools.misc import formatLang
+from odoo.tools.sql import create_index
 
 
 class MvComputeDiscountLine(models.Model):
@@ -23,6 +24,7 @@ class MvComputeDiscountLine(models.Model):
     name = fields.Char(related="parent_id.name", store=True)
     state = fields.Selection(related="parent_id.state", readonly=True)
     month_parent = fields.Integer()
+    year_parent = fields.Integer(compute="_compute_year_parent", store=True)
 
     # Base Fields:
     currency_id = fields.Many2one(
@@ -84,6 +86,20 @@ class MvComputeDiscountLine(models.Model):
     )
     promote_discount_money = fields.Float("Số tiền chiết khấu khuyến khích")
 
+    def init(self):
+        # Composite index to look up the discount history of a partner by period
+        create_index(
+            self._cr,
+            "mv_compute_discount_line_partner_period_index",
+            self._table,
+            ["partner_id", "year_parent", "month_parent"],
+        )
+
+    @api.depends("parent_id", "parent_id.year")
+    def _compute_year_parent(self):
+        for record in self:
+            record.year_parent = int(record.parent_id.year or 0)
+
     @api.depends("quantity", "quantity_from")
     def _compute_partner_sales_state(self):
         for record in self.filtered(
@@ -144,37 +160,32 @@ class MvComputeDiscountLine(models.Model):
         if not self._access_approve():
             raise AccessError(_("Bạn không có quyền duyệt!"))
 
-        vals = {}
-        discount_line_env = self.env["mv.compute.discount.line"]
+        histories = {}
         for rec in self.filtered(lambda r: r.quantity < r.quantity_from):
+            period = (rec.year_parent, rec.month_parent)
+            if period not in histories:
+                histories[period] = self._get_partner_history(
+                    self.partner_id.ids, *period
+                )
+
             # Case 1:
-            vals.update(
-                {
-                    "partner_sales_state": "qualified_by_approving",
-                    "is_month": True,
-                    "month": rec.discount_line_id.month,
-                    "month_money": (rec.month_money + rec.amount_total)
-                    * rec.discount_line_id.month
-                    / 100,
-                }
-            )
+            vals = {
+                "partner_sales_state": "qualified_by_approving",
+                "is_month": True,
+                "month": rec.discount_line_id.month,
+                "month_money": (rec.month_money + rec.amount_total)
+                * rec.discount_line_id.month
+                / 100,
+            }
             # Case 2:
-            amount_by_two_month = 0
-            previous_month = "{}/{}".format(
-                str(int(rec.month_parent) - 1), rec.parent_id.year
-            )
-            discount_line_previous_month = discount_line_env.search(
-                [
-                    ("partner_id", "=", rec.partner_id.id),
-                    ("is_month", "=", True),
-                    ("is_two_month", "=", False),
-                    ("name", "=", previous_month),
-                ]
-            )
+            previous_year, previous_month = self._get_previous_period(*period)
+            discount_line_previous_month = histories[period].get(
+                (rec.partner_id.id, previous_year, previous_month), self.browse()
+            ).filtered(lambda r: r.is_month and not r.is_two_month)
             if discount_line_previous_month:
-                for line in discount_line_previous_month:
-                    amount_by_two_month += line.amount_total
-
+                amount_by_two_month = sum(
+                    discount_line_previous_month.mapped("amount_total")
+                )
                 vals.update(
                     {
                         "is_two_month": True,
@@ -206,17 +217,15 @@ class MvComputeDiscountLine(models.Model):
         if not self._access_approve():
             raise AccessError(_("Bạn không có quyền duyệt!"))
 
+        history = self._get_partner_history(
+            self.partner_id.ids, self.year_parent, self.month_parent
+        )
         amount_two_month = 0
-        name_one = str(int(self.month_parent) - 1) + "/" + self.parent_id.year
-        name_two = str(int(self.month_parent) - 2) + "/" + self.parent_id.year
-        domain = [
-            ("name", "in", [name_one, name_two]),
-            ("partner_id", "=", self.partner_id.id),
-        ]
-        line_ids = self.env["mv.compute.discount.line"].search(domain)
-        if len(line_ids) > 0:
-            for line in line_ids:
-                amount_two_month += line.amount_total
+        for month in [self.month_parent - 1, self.month_parent - 2]:
+            line_ids = history.get(
+                (self.partner_id.id, self.year_parent, month), self.browse()
+            )
+            amount_two_month += sum(line_ids.mapped("amount_total"))
         self.write(
             {
                 "partner_sales_state": "qualified_by_approving",
@@ -243,13 +252,13 @@ class MvComputeDiscountLine(models.Model):
         if not self._access_approve():
             raise AccessError(_("Bạn không có quyền duyệt!"))
 
+        history = self._get_partner_history(self.partner_id.ids, self.year_parent, 12)
         total_year = 0
         for i in range(12):
-            name = str(i + 1) + "/" + self.parent_id.year
-            domain = [("name", "=", name), ("partner_id", "=", self.partner_id.id)]
-            line_ids = self.env["mv.compute.discount.line"].search(domain)
-            if len(line_ids) > 0:
-                total_year += line_ids.amount_total
+            line_ids = history.get(
+                (self.partner_id.id, self.year_parent, i + 1), self.browse()
+            )
+            total_year += sum(line_ids.mapped("amount_total"))
         self.write(
             {
                 "partner_sales_state": "qualified_by_approving",
@@ -380,6 +389,43 @@ class MvComputeDiscountLine(models.Model):
             return amount
         return formatLang(self.env, amount, currency_obj=currency_id)
 
+    @api.model
+    def _get_previous_period(self, year, month):
+        """
+            Returns the (year, month) before the given period.
+        """
+        return (year - 1, 12) if month == 1 else (year, month - 1)
+
+    @api.model
+    def _get_partner_history(self, partner_ids, year, month):
+        """
+            Fetches the discount lines of the partners over the 12 months up to the given
+            period (included) in one query, E.g: 3/2024 => from 4/2023 to 3/2024.
+
+        :param partner_ids: A list of res.partner ids.
+        :param year:        The year of the period.
+        :param month:       The month of the period.
+        :return:            A dict of discount lines by (partner_id, year, month).
+        """
+        lines = self.search(
+            [
+                ("parent_id", "!=", False),
+                ("partner_id", "in", partner_ids),
+                "|",
+                "&",
+                ("year_parent", "=", year),
+                ("month_parent", "<=", month),
+                "&",
+                ("year_parent", "=", year - 1),
+                ("month_parent", ">", month),
+            ]
+        )
+        history = {}
+        for line in lines:
+            key = (line.partner_id.id, line.year_parent, line.month_parent)
+            history[key] = history.get(key, self.browse()) | line
+        return history
+
     def _access_approve(self):
         """
             Helps check user security for access to Discount Line approval
@@ -3,6 +3,7 @@ import base64
 import io
 import logging
 import re
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 
 from dateutil.relativedelta import relativedelta
@@ -344,6 +345,10 @@ class MvComputeWarrantyDiscountPolicy(models.Model):
         try:
             self.ensure_one()
             if self.state != "draft":
+                if self.state == "done":
+                    self.env["mv.partner.discount.ledger"]._reverse_entries(
+                        "compute_warranty_discount_line_id", self.line_ids
+                    )
                 self.state = "draft"
                 self.line_ids.unlink()  # Remove all lines
                 return True
@@ -356,10 +361,10 @@ class MvComputeWarrantyDiscountPolicy(models.Model):
             raise AccessError("Bạn không có quyền duyệt!")
 
         for rec in self.filtered(lambda r: len(r.line_ids) > 0):
+            self.env["mv.partner.discount.ledger"]._credit_warranty_discount_lines(
+                rec.line_ids
+            )
             for line in rec.line_ids:
-                self.env["res.partner"].sudo().browse(
-                    line.partner_id.id
-                ).action_update_discount_amount()
                 line.helpdesk_ticket_product_moves_ids.mapped(
                     "helpdesk_ticket_id"
                 ).write(
@@ -458,63 +463,101 @@ class MvComputeWarrantyDiscountPolicy(models.Model):
         results = []
         policy_used = self.warranty_discount_policy_id
         compute_date = self.compute_date
+        policy_partner_ids = set(policy_used.partner_ids.mapped("partner_id").ids)
+
+        # [>] Fetch the policy lines once, they are the same for every partner
+        context_lines = dict(self.env.context or {})
+        first_policy_code = (
+            context_lines.get("first_policy_code") or "rim_lower_and_equal_16"
+        )
+        second_policy_code = (
+            context_lines.get("second_policy_code") or "rim_greater_and_equal_17"
+        )
+        third_policy_code = context_lines.get("third_policy_code") or None
+        first_warranty_policy = self._fetch_warranty_policy(first_policy_code)
+        second_warranty_policy = self._fetch_warranty_policy(second_policy_code)
+        third_warranty_policy = self._fetch_warranty_policy(
+            third_policy_code,
+            [
+                ("sequence", "=", 3),
+                ("explanation_code", "not in", [first_policy_code, second_policy_code]),
+            ],
+        )
+        first_quantity_to = float(first_warranty_policy.quantity_to)
+        second_quantity_from = float(second_warranty_policy.quantity_from)
+
+        # [>] Group the moves by partner in one pass: a move of a contact also
+        # belongs to its parent agency
+        moves_by_partner = defaultdict(list)
+        for move in ticket_product_moves:
+            moves_by_partner[move.partner_id.id].append(move.id)
+            if move.partner_id.parent_id:
+                moves_by_partner[move.partner_id.parent_id.id].append(move.id)
+        product_by_move = {
+            move.id: move.product_id.id for move in ticket_product_moves
+        }
+        eligible_partners = partners.filtered(
+            lambda p: p.is_agency and p.id in policy_partner_ids
+        )
+        eligible_move_ids = {
+            move_id
+            for partner in eligible_partners
+            for move_id in moves_by_partner[partner.id]
+        }
 
-        for partner in partners.filtered(
-            lambda p: p.is_agency
-            and p.id in policy_used.partner_ids.mapped("partner_id").ids
-        ):
+        # [>] Pre-compute the (first, second) counts of each product from its RIM values,
+        # only the products activated by the eligible partners are resolved
+        rim_diameters = self._fetch_product_rim_diameters(
+            policy_used,
+            ticket_product_moves.browse(eligible_move_ids).product_id,
+        )
+        product_counts = {}
+        for product_id, rims in rim_diameters.items():
+            first = sum(1 for rim in rims if rim <= first_quantity_to)
+            second = sum(
+                1
+                for rim in rims
+                if rim > first_quantity_to and rim >= second_quantity_from
+            )
+            product_counts[product_id] = (first, second)
+
+        for partner in eligible_partners:
             # Prepare values to calculate discount
             vals = self._prepare_values_to_calculate_discount(partner, compute_date)
 
-            partner_tickets_registered = ticket_product_moves.filtered(
-                lambda t: t.partner_id.id == partner.id
-                or t.partner_id.parent_id.id == partner.id
-            )
-            vals["helpdesk_ticket_product_moves_ids"] += partner_tickets_registered.ids
-            vals["product_activation_count"] = len(
-                list(set(partner_tickets_registered))
-            )
+            partner_move_ids = list(dict.fromkeys(moves_by_partner[partner.id]))
+            vals["helpdesk_ticket_product_moves_ids"] += partner_move_ids
+            vals["product_activation_count"] = len(partner_move_ids)
 
-            context_lines = dict(self.env.context or {})
+            first_count = second_count = 0
+            for move_id in partner_move_ids:
+                first, second = product_counts.get(product_by_move[move_id], (0, 0))
+                first_count += first
+                second_count += second
 
-            # ========= First Condition Warranty Policy =========
-            first_count = 0
-            first_policy_code = (
-                context_lines.get("first_policy_code") or "rim_lower_and_equal_16"
-            )
-            first_warranty_policy = self._fetch_warranty_policy(first_policy_code)
+            # ========= First Condition (Product has RIM <= 16) =========
             vals["first_warranty_policy_requirement_id"] = first_warranty_policy.id
             vals["first_quantity_from"] = first_warranty_policy.quantity_from
             vals["first_quantity_to"] = first_warranty_policy.quantity_to
             vals["first_warranty_policy_money"] = (
                 first_warranty_policy.discount_amount or 0
             )
-            # ========= Second Condition Warranty Policy =========
-            second_count = 0
-            second_policy_code = (
-                context_lines.get("second_policy_code") or "rim_greater_and_equal_17"
+            vals["first_count"] = first_count
+            vals["first_warranty_policy_total_money"] = (
+                first_warranty_policy.discount_amount * first_count
             )
-            second_warranty_policy = self._fetch_warranty_policy(second_policy_code)
+            # ========= Second Condition (Product has RIM >= 17) =========
             vals["second_warranty_policy_requirement_id"] = second_warranty_policy.id
             vals["second_quantity_from"] = second_warranty_policy.quantity_from
             vals["second_quantity_to"] = second_warranty_policy.quantity_to
             vals["second_warranty_policy_money"] = (
                 second_warranty_policy.discount_amount or 0
             )
-            # ========= Third Condition Warranty Policy =========
-            third_count = 0
-            third_policy_code = context_lines.get("third_policy_code") or None
-            third_warranty_policy = self._fetch_warranty_policy(
-                third_policy_code,
-                [
-                    ("sequence", "=", 3),
-                    (
-                        "explanation_code",
-                        "not in",
-                        [first_policy_code, second_policy_code],
-                    ),
-                ],
+            vals["second_count"] = second_count
+            vals["second_warranty_policy_total_money"] = (
+                second_warranty_policy.discount_amount * second_count
             )
+            # ========= Third Condition Warranty Policy =========
             vals["third_warranty_policy_requirement_id"] = third_warranty_policy.id
             vals["third_quantity_from"] = third_warranty_policy.quantity_from
             vals["third_quantity_to"] = third_warranty_policy.quantity_to
@@ -522,51 +565,6 @@ class MvComputeWarrantyDiscountPolicy(models.Model):
                 third_warranty_policy.discount_amount or 0
             )
 
-            for ticket_product_move in partner_tickets_registered:
-                product_tmpl = self._fetch_product_template(
-                    ticket_product_move.product_id.product_tmpl_id
-                )
-                for product in product_tmpl:
-                    product_tmpl_attribute_lines = (
-                        self._fetch_product_template_attribute_lines(
-                            policy_used, product
-                        )
-                    )
-                    if not product_tmpl_attribute_lines:
-                        raise MissingError(
-                            "Không tìm thấy thông tin thuộc tính sản phẩm!"
-                        )
-
-                    product_tmpl_attribute_values = (
-                        self._fetch_product_template_attribute_values(
-                            product_tmpl_attribute_lines
-                        )
-                    )
-                    product_attribute_values = self._fetch_product_attribute_values(
-                        policy_used, product_tmpl_attribute_values
-                    )
-
-                    for attribute in product_attribute_values:
-                        # ========= First Condition (Product has RIM <= 16) =========
-                        if float(attribute.name) <= float(
-                            first_warranty_policy.quantity_to
-                        ):
-                            first_count += 1
-                        # ========= Second Condition (Product has RIM >= 17) =========
-                        elif float(attribute.name) >= float(
-                            second_warranty_policy.quantity_from
-                        ):
-                            second_count += 1
-
-            vals["first_count"] = first_count
-            vals["first_warranty_policy_total_money"] = (
-                first_warranty_policy.discount_amount * first_count
-            )
-            vals["second_count"] = second_count
-            vals["second_warranty_policy_total_money"] = (
-                second_warranty_policy.discount_amount * second_count
-            )
-
             results.append((0, 0, vals))
 
         return results
@@ -643,62 +641,49 @@ class MvComputeWarrantyDiscountPolicy(models.Model):
             _logger.error(f"Failed to fetch warranty policy: {e}")
             return self.env["mv.warranty.discount.policy.line"]
 
-    def _fetch_product_template(self, products):
-        try:
-            if products:
-                return self.env["product.template"].search(
-                    [("id", "in", products.ids), ("detailed_type", "=", "product")]
-                )
-        except Exception as e:
-            _logger.error(f"Failed to fetch product template: {e}")
-            return self.env["product.template"]
+    def _fetch_product_rim_diameters(self, policy_used, products):
+        """
+            Resolves the RIM diameters of the products in one pass over their templates.
+        :param policy_used: mv.warranty.discount.policy
+        :param products: product.product recordset
+        :return: A dict {product_id: [rim, ...]} for the storable products
+        """
+        templates = products.product_tmpl_id.filtered(
+            lambda t: t.detailed_type == "product"
+        )
+        if not templates or not policy_used:
+            return {}
 
-    def _fetch_product_template_attribute_lines(self, policy_used, products):
-        try:
-            if products:
-                return self.env["product.template.attribute.line"].search(
-                    [
-                        ("product_tmpl_id", "in", products.ids),
-                        ("attribute_id", "in", policy_used.product_attribute_ids.ids),
-                    ]
-                )
-        except Exception as e:
-            _logger.error(f"Failed to fetch product template attribute lines: {e}")
-            return self.env["product.template.attribute.line"]
+        attribute_ids = policy_used.product_attribute_ids.ids
+        attribute_lines = self.env["product.template.attribute.line"].search(
+            [
+                ("product_tmpl_id", "in", templates.ids),
+                ("attribute_id", "in", attribute_ids),
+            ]
+        )
+        if templates - attribute_lines.product_tmpl_id:
+            raise MissingError("Không tìm thấy thông tin thuộc tính sản phẩm!")
 
-    def _fetch_product_template_attribute_values(self, products):
-        try:
-            if products:
-                return self.env["product.template.attribute.value"].search(
-                    [
-                        ("attribute_line_id", "in", products.ids),
-                        ("ptav_active", "=", True),
-                    ]
-                )
-        except Exception as e:
-            _logger.error(f"Failed to fetch product template attribute values: {e}")
-            return self.env["product.template.attribute.value"]
+        template_values = self.env["product.template.attribute.value"].search(
+            [
+                ("attribute_line_id", "in", attribute_lines.ids),
+                ("ptav_active", "=", True),
+            ]
+        )
+        rims_by_template = defaultdict(set)
+        for value in template_values:
+            attribute_value = value.product_attribute_value_id
+            if attribute_value.attribute_id.id in attribute_ids:
+                rims_by_template[value.product_tmpl_id.id].add(attribute_value)
 
-    def _fetch_product_attribute_values(self, policy_used, products):
-        try:
-            if products and policy_used:
-                return self.env["product.attribute.value"].search(
-                    [
-                        (
-                            "id",
-                            "in",
-                            products.mapped("product_attribute_value_id")
-                            .filtered(
-                                lambda v: v.attribute_id.id
-                                in policy_used.product_attribute_ids.ids
-                            )
-                            .ids,
-                        )
-                    ]
-                )
-        except Exception as e:
-            _logger.error(f"Failed to fetch product attribute values: {e}")
-            return self.env["product.attribute.value"]
+        return {
+            product.id: [
+                float(value.name)
+                for value in rims_by_template[product.product_tmpl_id.id]
+            ]
+            for product in products
+            if product.product_tmpl_id in templates
+        }
 
     # =================================
     # ORM Methods
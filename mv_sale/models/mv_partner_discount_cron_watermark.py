@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from odoo import _, api, fields, models
+
+
+class MvPartnerDiscountCronWatermark(models.Model):
+    """
+    Last agency processed by each partition of the partner discount cron.
+    Updated with plain SQL: ir.config_parameter writes clear the caches of every worker.
+    """
+
+    _name = "mv.partner.discount.cron.watermark"
+    _description = _("Partner Discount Cron Watermark")
+    _rec_name = "partition"
+
+    partition = fields.Integer(required=True, readonly=True)
+    watermark = fields.Integer(default=0, readonly=True)
+
+    _sql_constraints = [
+        (
+            "partition_unique",
+            "UNIQUE(partition)",
+            "Each partition of the cron has only one watermark!",
+        )
+    ]
+
+    @api.model
+    def _get_watermark(self, partition):
+        self.env.cr.execute(
+            "SELECT watermark FROM mv_partner_discount_cron_watermark WHERE partition = %s",
+            [partition],
+        )
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _set_watermark(self, partition, watermark):
+        self.env.cr.execute(
+            """
+            INSERT INTO mv_partner_discount_cron_watermark
+                (partition, watermark, create_uid, create_date, write_uid, write_date)
+            VALUES (%(partition)s, %(watermark)s, %(uid)s, NOW() AT TIME ZONE 'UTC',
+                    %(uid)s, NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (partition) DO UPDATE
+            SET watermark = EXCLUDED.watermark,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date;
+            """,
+            {"partition": partition, "watermark": watermark, "uid": self.env.uid},
+        )
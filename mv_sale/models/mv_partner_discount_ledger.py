@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import float_is_zero
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+
+class MvPartnerDiscountLedger(models.Model):
+    _name = "mv.partner.discount.ledger"
+    _description = _("Partner Discount Ledger")
+    _order = "id desc"
+    _rec_name = "partner_id"
+
+    partner_id = fields.Many2one(
+        "res.partner", "Đại lý", required=True, readonly=True, ondelete="cascade"
+    )
+    currency_id = fields.Many2one(
+        "res.currency",
+        default=lambda self: self.env.company.currency_id,
+        readonly=True,
+    )
+    date = fields.Datetime("Ngày", default=fields.Datetime.now, readonly=True)
+    move_type = fields.Selection(
+        [
+            ("credit", "Ghi có"),
+            ("debit", "Ghi nợ"),
+            ("reversal", "Hoàn lại"),
+            ("adjustment", "Đối soát"),
+            ("opening", "Số dư đầu kỳ"),
+        ],
+        "Loại",
+        required=True,
+        readonly=True,
+    )
+    amount = fields.Monetary("Số tiền", currency_field="currency_id", readonly=True)
+    balance = fields.Monetary(
+        "Số dư",
+        currency_field="currency_id",
+        readonly=True,
+        help="Số dư chiết khấu của Đại lý sau khi ghi nhận dòng này.",
+    )
+    # === Origin Fields ===#
+    compute_discount_line_id = fields.Many2one(
+        "mv.compute.discount.line", readonly=True, index="btree_not_null"
+    )
+    compute_warranty_discount_line_id = fields.Many2one(
+        "mv.compute.warranty.discount.policy.line",
+        readonly=True,
+        index="btree_not_null",
+    )
+    sale_order_id = fields.Many2one("sale.order", readonly=True, index="btree_not_null")
+    reversed_entry_id = fields.Many2one(
+        "mv.partner.discount.ledger", readonly=True, index="btree_not_null"
+    )
+    reversal_entry_ids = fields.One2many(
+        "mv.partner.discount.ledger", "reversed_entry_id", readonly=True
+    )
+
+    def init(self):
+        # Fetch the last balance of a partner without scanning its whole history
+        create_index(
+            self._cr,
+            "mv_partner_discount_ledger_partner_id_id_index",
+            self._table,
+            ["partner_id", "id"],
+        )
+        self._seed_opening_balances()
+
+    def _seed_opening_balances(self):
+        """
+            Opens the ledger of the partners from their current discount amount, so that
+            the first postings start from the existing balance instead of zero.
+            Partners which already have entries are skipped, it is safe to run on every update.
+        """
+        self._cr.execute(
+            """
+            INSERT INTO mv_partner_discount_ledger
+                (partner_id, currency_id, date, move_type, amount, balance,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT p.id,
+                   COALESCE(c.currency_id, (SELECT currency_id FROM res_company ORDER BY id LIMIT 1)),
+                   NOW() AT TIME ZONE 'UTC',
+                   'opening',
+                   p.amount_currency,
+                   p.amount_currency,
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM res_partner p
+            LEFT JOIN res_company c ON c.id = p.company_id
+            WHERE COALESCE(p.amount_currency, 0) <> 0
+              AND NOT EXISTS (SELECT 1
+                              FROM mv_partner_discount_ledger l
+                              WHERE l.partner_id = p.id);
+            """,
+            {"uid": self.env.uid},
+        )
+        if self._cr.rowcount:
+            _logger.info("Opened the discount ledger of %s partners.", self._cr.rowcount)
+
+    # =================================
+    # ORM / CRUD Methods
+    # =================================
+
+    def write(self, vals):
+        raise UserError(
+            _("Không thể chỉnh sửa sổ chiết khấu, vui lòng tạo bút toán hoàn lại!")
+        )
+
+    def unlink(self):
+        raise UserError(_("Không thể xóa sổ chiết khấu, vui lòng tạo bút toán hoàn lại!"))
+
+    # =================================
+    # BUSINESS Methods
+    # =================================
+
+    @api.model
+    def _post_entries(self, vals_list):
+        """
+            Appends the entries to the ledger and updates the running balance of their partners.
+        :param vals_list: A list of dict with at least [partner_id, move_type, amount]
+        :return: mv.partner.discount.ledger recordset
+        """
+        vals_list = [
+            vals
+            for vals in vals_list
+            if not float_is_zero(vals["amount"], precision_digits=2)
+        ]
+        if not vals_list:
+            return self.browse()
+
+        partner_ids = list({vals["partner_id"] for vals in vals_list})
+        # [>] Serialize the postings of a partner to keep its running balance consistent
+        self.env.cr.execute(
+            "SELECT id FROM res_partner WHERE id IN %s FOR NO KEY UPDATE",
+            [tuple(partner_ids)],
+        )
+        balances = self._get_balances(partner_ids)
+        for vals in vals_list:
+            balance = balances[vals["partner_id"]] + vals["amount"]
+            vals["balance"] = balances[vals["partner_id"]] = balance
+
+        entries = self.sudo().create(vals_list)
+        for partner in self.env["res.partner"].sudo().browse(partner_ids):
+            amount = balances[partner.id] if balances[partner.id] > 0 else 0.0
+            partner.write({"amount": amount, "amount_currency": amount})
+        return entries
+
+    @api.model
+    def _get_balances(self, partner_ids):
+        """
+            Returns the current balance of the partners, read from their last ledger entry.
+        :param partner_ids: A list of res.partner ids
+        :return: A dict {partner_id: balance}
+        """
+        balances = dict.fromkeys(partner_ids, 0.0)
+        if not partner_ids:
+            return balances
+
+        self.flush_model(["partner_id", "balance"])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT ON (partner_id) partner_id, balance
+            FROM mv_partner_discount_ledger
+            WHERE partner_id IN %s
+            ORDER BY partner_id, id DESC;
+            """,
+            [tuple(partner_ids)],
+        )
+        balances.update(dict(self.env.cr.fetchall()))
+        return balances
+
+    @api.model
+    def _credit_compute_discount_lines(self, lines):
+        """
+            Credits the approved "Chiết khấu sản lượng" lines to their partners.
+        """
+        credited = self._get_open_entries("compute_discount_line_id", lines)
+        return self._post_entries(
+            [
+                {
+                    "partner_id": line.partner_id.id,
+                    "move_type": "credit",
+                    "amount": line.total_money,
+                    "compute_discount_line_id": line.id,
+                }
+                for line in lines
+                if line.partner_id and line not in credited.compute_discount_line_id
+            ]
+        )
+
+    @api.model
+    def _credit_warranty_discount_lines(self, lines):
+        """
+            Credits the approved "Chiết khấu kích hoạt" lines to their partners.
+        """
+        credited = self._get_open_entries("compute_warranty_discount_line_id", lines)
+        return self._post_entries(
+            [
+                {
+                    "partner_id": line.partner_id.id,
+                    "move_type": "credit",
+                    "amount": line.total_amount_currency,
+                    "compute_warranty_discount_line_id": line.id,
+                }
+                for line in lines
+                if line.partner_id
+                and line not in credited.compute_warranty_discount_line_id
+            ]
+        )
+
+    @api.model
+    def _debit_sale_orders(self, orders):
+        """
+            Debits the discount amount used by the confirmed orders of the agencies.
+        """
+        debited = self._get_open_entries("sale_order_id", orders)
+        return self._post_entries(
+            [
+                {
+                    "partner_id": order.partner_id.id,
+                    "move_type": "debit",
+                    "amount": -order.bonus_order,
+                    "sale_order_id": order.id,
+                }
+                for order in orders
+                if order.partner_id
+                and order.discount_agency_set
+                and order not in debited.sale_order_id
+            ]
+        )
+
+    @api.model
+    def _reverse_entries(self, field_name, records):
+        """
+            Reverses the open entries created from the given records (cancelled orders,
+            discount computations reset to draft, ...).
+        :param field_name: The origin field of the entries, E.g: sale_order_id
+        :param records: The origin recordset
+        """
+        entries = self._get_open_entries(field_name, records)
+        return self._post_entries(
+            [
+                {
+                    "partner_id": entry.partner_id.id,
+                    "move_type": "reversal",
+                    "amount": -entry.amount,
+                    field_name: entry[field_name].id,
+                    "reversed_entry_id": entry.id,
+                }
+                for entry in entries
+            ]
+        )
+
+    @api.model
+    def _get_open_entries(self, field_name, records):
+        """
+            Fetches the credit/debit entries of the records which are not reversed yet.
+        """
+        if not records:
+            return self.browse()
+
+        return self.sudo().search(
+            [
+                (field_name, "in", records.ids),
+                ("move_type", "in", ["credit", "debit"]),
+                ("reversal_entry_ids", "=", False),
+            ]
+        )
+
+    @api.model
+    def _reconcile_balance(self, partner, balance):
+        """
+            Adjusts the ledger of the partner to the balance rebuilt from its documents.
+        """
+        difference = balance - self._get_balances(partner.ids)[partner.id]
+        if not float_is_zero(difference, precision_digits=2):
+            _logger.info(
+                "Reconcile discount ledger of partner %s: %s", partner.id, difference
+            )
+        return self._post_entries(
+            [
+                {
+                    "partner_id": partner.id,
+                    "move_type": "adjustment",
+                    "amount": difference,
+                }
+            ]
+        )
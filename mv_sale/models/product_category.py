@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo.addons.mv_sale.models.sale_order import TARGET_CATEGORY_ID
+
+from odoo import api, fields, models
+
+
+class ProductCategory(models.Model):
+    _inherit = "product.category"
+
+    is_tyre_category = fields.Boolean(
+        "Danh mục lốp xe",
+        compute="_compute_is_tyre_category",
+        store=True,
+        recursive=True,
+        index=True,
+        help="Danh mục (hoặc danh mục con) của Lốp xe được tính chiết khấu sản lượng.",
+    )
+
+    @api.depends("parent_id", "parent_id.is_tyre_category")
+    def _compute_is_tyre_category(self):
+        for categ in self:
+            categ.is_tyre_category = (
+                categ.id == TARGET_CATEGORY_ID or categ.parent_id.is_tyre_category
+            )
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models, tools
+
+# Service products of the discounts: CKT (Chiết khấu sản lượng), CKBL (Chiết khấu bảo lãnh),
+# CKSLL (Chiết khấu Đại lý), CKSLVT (Chiết khấu Đại lý vùng trắng), CKSLMN (Chiết khấu Đại lý miền Nam)
+SERVICE_PRODUCT_CODES = ["CKT", "CKBL", "CKSLL", "CKSLVT", "CKSLMN"]
+DELIVERY_PRODUCT_CODE = "Delivery_"
+
+
+class ProductProduct(models.Model):
+    _inherit = "product.product"
+
+    # /// CRUD Methods
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super(ProductProduct, self).create(vals_list)
+        if any(
+            self._is_service_product_code(code)
+            for code in products.mapped("default_code")
+        ):
+            self._clear_service_product_cache()
+        return products
+
+    def write(self, vals):
+        # The old and the new codes are checked, a product can leave the registry
+        service_products_changed = "default_code" in vals and (
+            self._is_service_product_code(vals["default_code"])
+            or any(
+                self._is_service_product_code(code)
+                for code in self.mapped("default_code")
+            )
+        )
+        res = super(ProductProduct, self).write(vals)
+        if service_products_changed:
+            self._clear_service_product_cache()
+        return res
+
+    def unlink(self):
+        service_products_changed = any(
+            self._is_service_product_code(code) for code in self.mapped("default_code")
+        )
+        res = super(ProductProduct, self).unlink()
+        if service_products_changed:
+            self._clear_service_product_cache()
+        return res
+
+    # /// Service Products Registry
+
+    @api.model
+    @tools.ormcache()
+    def _get_service_product_ids_by_code(self):
+        """
+            Resolves once the special service products (discounts and delivery).
+        :return: A dict {default_code: tuple of product ids}, the delivery products are
+            gathered under DELIVERY_PRODUCT_CODE
+        """
+        # Lines of archived discount products are still classified
+        products = self.sudo().with_context(active_test=False).search_read(
+            [
+                "|",
+                ("default_code", "in", SERVICE_PRODUCT_CODES),
+                ("default_code", "=like", f"%{DELIVERY_PRODUCT_CODE}%"),
+            ],
+            ["default_code"],
+        )
+        product_ids_by_code = {}
+        for product in products:
+            code = product["default_code"]
+            if code not in SERVICE_PRODUCT_CODES:
+                # "_" is a wildcard of LIKE, the code is checked again here
+                if DELIVERY_PRODUCT_CODE not in code:
+                    continue
+                code = DELIVERY_PRODUCT_CODE
+            product_ids_by_code.setdefault(code, ())
+            product_ids_by_code[code] += (product["id"],)
+        return product_ids_by_code
+
+    @api.model
+    def _get_service_product_ids(self, default_code):
+        return self._get_service_product_ids_by_code().get(default_code, ())
+
+    @api.model
+    def _get_service_product(self, default_code):
+        """:return: The active product.product of the service code, empty if not found"""
+        products = self.browse(self._get_service_product_ids(default_code))
+        return products.filtered("active")[:1]
+
+    @api.model
+    def _is_service_product_code(self, default_code):
+        return bool(default_code) and (
+            default_code in SERVICE_PRODUCT_CODES
+            or DELIVERY_PRODUCT_CODE in default_code
+        )
+
+    @api.model
+    def _clear_service_product_cache(self):
+        self.env.registry.clear_cache()
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 import logging
+import threading
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
 
 _logger = logging.getLogger(__name__)
 
+PARTNER_DISCOUNT_CRON_PARTITIONS = 4
+
 
 class ResPartner(models.Model):
     _inherit = "res.partner"
@@ -56,6 +59,11 @@ class ResPartner(models.Model):
     amount = fields.Float(readonly=True)
     amount_currency = fields.Monetary(readonly=True, currency_field="currency_id")
     total_so_bonus_order = fields.Monetary(compute="_compute_sale_order", store=True)
+    discount_ledger_ids = fields.One2many(
+        comodel_name="mv.partner.discount.ledger",
+        inverse_name="partner_id",
+        string="Sổ chiết khấu",
+    )
     # === Other Fields ===#
     sale_mv_ids = fields.Many2many("sale.order", readonly=True)
     currency_id = fields.Many2one("res.currency", compute="_get_company_currency")
@@ -86,35 +94,13 @@ class ResPartner(models.Model):
 
     @api.depends("sale_order_ids")
     def _compute_sale_order(self):
+        # [!] 'amount' / 'amount_currency' are kept up to date by the discount ledger
         for record in self:
-            record.sale_mv_ids = None
-            record.total_so_bonus_order = 0
-            record.amount = record.amount_currency = 0
-
             orders_discount = record.sale_order_ids.filtered(
                 lambda order: order.discount_agency_set and order.state in ["sale"]
             )
-            if orders_discount:
-                orders_discount._compute_partner_bonus()
-                record.sale_mv_ids = [(6, 0, orders_discount.ids)]
-                record.total_so_bonus_order = sum(orders_discount.mapped("bonus_order"))
-
-            total_policy_discount_approved = sum(
-                line.total_money
-                for line in record.compute_discount_line_ids.filtered(
-                    lambda r: r.state == "done"
-                )
-            ) + sum(
-                line.total_amount_currency
-                for line in record.compute_warranty_discount_line_ids.filtered(
-                    lambda r: r.parent_state == "done"
-                )
-            )
-
-            total_after = total_policy_discount_approved - record.total_so_bonus_order
-            record.amount = record.amount_currency = (
-                total_after if total_after > 0 else 0.0
-            )
+            record.sale_mv_ids = [(6, 0, orders_discount.ids)]
+            record.total_so_bonus_order = sum(orders_discount.mapped("bonus_order"))
 
     @api.onchange("is_agency")
     def _onchange_is_white_agency(self):
@@ -176,6 +162,11 @@ class ResPartner(models.Model):
     # =================================
 
     def action_update_discount_amount(self):
+        """
+            Reconciliation: rebuilds the discount amount of the agencies from all their documents
+            and adjusts their discount ledger when it has drifted.
+        """
+        DiscountLedger = self.env["mv.partner.discount.ledger"]
         for partner in self.filtered("is_agency"):
             partner.sale_mv_ids = [(6, 0, [])]
             partner.total_so_bonus_order = 0
@@ -204,8 +195,9 @@ class ResPartner(models.Model):
                 ).mapped("total_amount_currency")
             )
 
-            # [>] Update 'amount' and 'amount_currency'
+            # [>] Update 'amount' and 'amount_currency' through the ledger
             total_after = total_discount_money - partner.total_so_bonus_order
+            DiscountLedger._reconcile_balance(partner, total_after)
             partner.amount = partner.amount_currency = (
                 total_after if total_after > 0 else 0.0
             )
@@ -230,30 +222,70 @@ class ResPartner(models.Model):
     # ==================================
 
     @api.model
-    def _cron_recompute_partner_discount(self, limit=None):
+    def _cron_recompute_partner_discount(self, limit=None, partition=0):
         """
         Scheduled task to recompute the discount for partner agencies.
+        Agencies are split into PARTNER_DISCOUNT_CRON_PARTITIONS partitions (partner id modulo N),
+        each one handled by its own cron. Agencies are processed by chunks ordered by id,
+        the last processed id is saved as a watermark and committed with each chunk,
+        so an interrupted run resumes where it stopped.
 
         Args:
-            limit (int, optional): The maximum number of partners to process.
+            limit (int, optional): The number of partners to process per chunk.
                                    If not provided, defaults to 80.
+            partition (int, optional): The partition handled by this cron.
 
         Returns:
             bool: True if the task completed successfully, False otherwise.
         """
         records_limit = limit if limit else 80
+        Watermark = self.env["mv.partner.discount.cron.watermark"].sudo()
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        total = 0
         try:
-            partners = (
-                self.env["res.partner"]
-                .sudo()
-                .search([("is_agency", "=", True)], limit=records_limit)
-            )
-            for partner in partners:
-                partner.with_context(
+            watermark = Watermark._get_watermark(partition)
+            while True:
+                partner_ids = self._get_agency_ids_to_recompute(
+                    watermark, partition, records_limit
+                )
+                if not partner_ids:
+                    # [>] Cycle completed, the next run starts from the beginning
+                    Watermark._set_watermark(partition, 0)
+                    break
+
+                self.env["res.partner"].sudo().browse(partner_ids).with_context(
                     cron_service_run=True
                 ).action_update_discount_amount()
-            _logger.info(f"Recomputed discount for {len(partners)} partner agencies.")
+                watermark = partner_ids[-1]
+                Watermark._set_watermark(partition, watermark)
+                total += len(partner_ids)
+                if auto_commit:
+                    self.env.cr.commit()
+
+            _logger.info(
+                f"Recomputed discount for {total} partner agencies (partition {partition})."
+            )
             return True
         except Exception as e:
+            # The previous chunks are committed already, only the failed one is discarded
+            self.env.cr.rollback()
             _logger.error(f"Failed to recompute discount for partner agencies: {e}")
             return False
+
+    @api.model
+    def _get_agency_ids_to_recompute(self, watermark, partition, limit):
+        """
+        Fetches the next chunk of agency ids after the watermark in the given partition.
+        """
+        self.flush_model(["is_agency", "active"])
+        self.env.cr.execute(
+            """
+            SELECT id
+            FROM res_partner
+            WHERE is_agency AND active AND id > %s AND id %% %s = %s
+            ORDER BY id
+            LIMIT %s;
+            """,
+            [watermark, PARTNER_DISCOUNT_CRON_PARTITIONS, partition, limit],
+        )
+        return [r[0] for r in self.env.cr.fetchall()]
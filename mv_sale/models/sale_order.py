@@ -165,7 +165,7 @@ class SaleOrder(models.Model):
 
     def check_category_product(self, categ_id):
         """
-        Check if the given product category or any of its parent categories have an ID of TARGET_CATEGORY_ID.
+        Check if the given product category is TARGET_CATEGORY_ID or one of its children.
 
         Args:
             categ_id (models.Model): The product category to check.
@@ -174,15 +174,7 @@ class SaleOrder(models.Model):
             bool: True if the product category
             or any of its parent categories have an ID of TARGET_CATEGORY_ID, False otherwise.
         """
-        try:
-            if categ_id.id == TARGET_CATEGORY_ID:
-                return True
-            if categ_id.parent_id:
-                return self.check_category_product(categ_id.parent_id)
-        except AttributeError as e:
-            _logger.error("Failed to check category product: %s", e)
-            return False
-        return False
+        return bool(categ_id.is_tyre_category)
 
     def _get_order_lines_to_report(self):
         Orders = super(SaleOrder, self)._get_order_lines_to_report()
@@ -194,78 +186,83 @@ class SaleOrder(models.Model):
 
     @api.depends("order_line", "order_line.product_id", "order_line.product_uom_qty")
     def _compute_discount(self):
-        for order in self:
-            # RESET all discount values
-            order.reset_discount_values()
+        # [>] Prefetch the product fields of all the lines at once
+        products = self.order_line.product_id
+        products.product_tmpl_id.mapped("detailed_type")
+        products.categ_id.mapped("is_tyre_category")
 
-            # [!] Kiểm tra có phải Đại lý trực thuộc của MOVEO+ hay không?
-            partner_agency = order.partner_id.is_agency
-            if order.order_line:
-                # [!] Kiểm tra xem thỏa điều kiện để mua đủ trên 10 lốp xe continental
-                order.check_discount_10 = (
-                    order.check_discount_applicable() if partner_agency else False
-                )
-                # [!] Tính tổng tiền giá sản phẩm không bao gồm hàng Dịch Vụ,
-                #      tính giá gốc ban đầu, không bao gồm Thuế
-                order.calculate_discount_values()
-
-            # [!] Nếu không còn dòng sản phẩm nào thì xóa hết các dòng chiết khấu bao gồm cả phương thức giao hàng
-            order.handle_discount_lines()
+        for order in self:
+            order.update(order._get_discount_values())
 
-    def reset_discount_values(self):
-        self.percentage = 0
-        self.check_discount_10 = False
-        self.total_price_no_service = 0
-        self.total_price_discount = 0
-        self.total_price_after_discount = 0
-        self.total_price_discount_10 = 0
-        self.total_price_after_discount_10 = 0
-        self.total_price_after_discount_month = 0
-
-    def check_discount_applicable(self):
-        order_lines = self.order_line.filtered(
-            lambda sol: self.check_category_product(sol.product_id.categ_id)
-            and sol.product_id.product_tmpl_id.detailed_type == "product"
-        )
-        return (
-            len(order_lines) >= 1
-            and sum(order_lines.mapped("product_uom_qty"))
-            >= DISCOUNT_QUANTITY_THRESHOLD
-        )
+    def _get_discount_values(self):
+        """
+            Computes the discount totals of the order in a single pass over its lines.
+        :return: A dict of values for the stored totals
+        """
+        self.ensure_one()
+        values = {
+            "percentage": 0,
+            "check_discount_10": False,
+            "total_price_no_service": 0,
+            "total_price_discount": 0,
+            "total_price_after_discount": 0,
+            "total_price_discount_10": 0,
+            "total_price_after_discount_10": 0,
+            "total_price_after_discount_month": 0,
+        }
+        if not self.order_line:
+            return values
 
-    def calculate_discount_values(self):
         percentage = 0
         total_price_no_service = 0
         total_price_discount = 0
-
-        for line in self.order_line.filtered(
-            lambda sol: sol.product_id.product_tmpl_id.detailed_type == "product"
-        ):
-            total_price_no_service += line.price_unit * line.product_uom_qty
+        tyre_lines = 0
+        tyre_quantity = 0
+        for line in self.order_line:
+            product = line.product_id
+            if product.product_tmpl_id.detailed_type != "product":
+                continue
+
+            # [!] Tính tổng tiền giá sản phẩm không bao gồm hàng Dịch Vụ,
+            #      tính giá gốc ban đầu, không bao gồm Thuế
+            price_total = line.price_unit * line.product_uom_qty
+            total_price_no_service += price_total
             total_price_discount += (
-                line.price_unit
-                * line.product_uom_qty
-                * line.discount
-                / DISCOUNT_PERCENTAGE_DIVISOR
+                price_total * line.discount / DISCOUNT_PERCENTAGE_DIVISOR
             )
             percentage = line.discount
 
-        self.percentage = percentage
-        self.total_price_no_service = total_price_no_service
-        self.total_price_discount = total_price_discount
-        self.total_price_after_discount = (
-            self.total_price_no_service - self.total_price_discount
-        )
+            if product.categ_id.is_tyre_category:
+                tyre_lines += 1
+                tyre_quantity += line.product_uom_qty
 
-        self.total_price_discount_10 = (
-            self.total_price_after_discount / DISCOUNT_PERCENTAGE_DIVISOR
+        total_price_after_discount = total_price_no_service - total_price_discount
+        total_price_discount_10 = (
+            total_price_after_discount / DISCOUNT_PERCENTAGE_DIVISOR
         )
-        self.total_price_after_discount_10 = (
-            self.after_discount_bank_guarantee - self.total_price_discount_10
+        total_price_after_discount_10 = (
+            self.after_discount_bank_guarantee - total_price_discount_10
         )
-        self.total_price_after_discount_month = (
-            self.total_price_after_discount_10 - self.bonus_order
+        values.update(
+            {
+                "percentage": percentage,
+                # [!] Kiểm tra có phải Đại lý trực thuộc của MOVEO+ hay không?
+                # [!] Kiểm tra xem thỏa điều kiện để mua đủ trên 10 lốp xe continental
+                "check_discount_10": bool(
+                    self.partner_id.is_agency
+                    and tyre_lines >= 1
+                    and tyre_quantity >= DISCOUNT_QUANTITY_THRESHOLD
+                ),
+                "total_price_no_service": total_price_no_service,
+                "total_price_discount": total_price_discount,
+                "total_price_after_discount": total_price_after_discount,
+                "total_price_discount_10": total_price_discount_10,
+                "total_price_after_discount_10": total_price_after_discount_10,
+                "total_price_after_discount_month": total_price_after_discount_10
+                - self.bonus_order,
+            }
         )
+        return values
 
     def handle_discount_lines(self):
         """
@@ -281,9 +278,9 @@ class SaleOrder(models.Model):
             discount_product_codes.add("CKSLMN")  # CKSLMN: Chiết khấu Đại lý miền Nam
 
         # [>] Separate order lines into discount lines and product lines
-        discount_lines = self.order_line.filtered(
-            lambda sol: sol.product_id.default_code in discount_product_codes
-        )
+        discount_lines = self.order_line.browse()
+        for code in discount_product_codes:
+            discount_lines |= self.order_line._filter_service_product_lines(code)
         product_lines = self.order_line.filtered(
             lambda sol: sol.product_id.product_tmpl_id.detailed_type == "product"
         )
@@ -299,7 +296,15 @@ class SaleOrder(models.Model):
     def write(self, vals):
         context = self.env.context.copy()
         _logger.debug(f"Context: {context}")
-        return super(SaleOrder, self.with_context(context)).write(vals)
+        res = super(SaleOrder, self.with_context(context)).write(vals)
+        if "order_line" in vals:
+            self._handle_discount_lines_after_write()
+        return res
+
+    def _handle_discount_lines_after_write(self):
+        # [!] Nếu không còn dòng sản phẩm nào thì xóa hết các dòng chiết khấu bao gồm cả phương thức giao hàng
+        for order in self.exists():
+            order.handle_discount_lines()
 
     # ==================================
     # BUSINESS Methods
@@ -322,14 +327,14 @@ class SaleOrder(models.Model):
                     return total_bonus
 
                 # Filter order lines for products
-                product_order_lines = self.order_line.filtered(
-                    lambda sol: sol.product_id.default_code == default_code
+                product_order_lines = self.order_line._filter_service_product_lines(
+                    default_code
                 )
                 if not product_order_lines:
                     # Create new product template if it doesn't exist
-                    product_discount = self.env["product.template"].search(
-                        [("default_code", "=", default_code)]
-                    )
+                    product_discount = self.env[
+                        "product.product"
+                    ]._get_service_product(default_code).product_tmpl_id
                     if not product_discount:
                         product_discount = (
                             self.env["product.template"]
@@ -345,29 +350,22 @@ class SaleOrder(models.Model):
                             )
                         )
 
-                    # Check for existing discount line
-                    discount_order_line = self.order_line.filtered(
-                        lambda sol: sol.product_id.default_code == default_code
+                    self.env["sale.order.line"].create(
+                        {
+                            "order_id": self.id,
+                            "product_id": product_discount.product_variant_ids[
+                                0
+                            ].id,
+                            "code_product": default_code,
+                            "product_uom_qty": 1,
+                            "price_unit": -total_bonus,
+                            "hidden_show_qty": True,
+                        }
                     )
-                    if not discount_order_line:
-                        self.env["sale.order.line"].create(
-                            {
-                                "order_id": self.id,
-                                "product_id": product_discount.product_variant_ids[
-                                    0
-                                ].id,
-                                "code_product": default_code,
-                                "product_uom_qty": 1,
-                                "price_unit": -total_bonus,
-                                "hidden_show_qty": True,
-                            }
-                        )
-                        _logger.info("Created discount line for partner.")
+                    _logger.info("Created discount line for partner.")
                 else:
                     # Update price unit of the order line
-                    self.order_line.filtered(
-                        lambda sol: sol.product_id.default_code == default_code
-                    ).write(
+                    product_order_lines.write(
                         {
                             "price_unit": -total_bonus,
                         }
@@ -424,11 +422,11 @@ class SaleOrder(models.Model):
         default_code = "CKBL"
 
         # [!] Kiểm tra tồn tại Sản Phẩm dịch vụ cho Chiết Khấu Bảo Lãnh
-        product_discount_CKBL = self.env["product.product"].search(
-            [("default_code", "=", default_code)], limit=1
+        product_discount_CKBL = self.env["product.product"]._get_service_product(
+            default_code
         )
         if not product_discount_CKBL:
-            self.env["product.product"].sudo().create(
+            product_discount_CKBL = self.env["product.product"].sudo().create(
                 {
                     "name": "Chiết khấu bảo lãnh",
                     "default_code": "CKBL",
@@ -441,8 +439,8 @@ class SaleOrder(models.Model):
             )
 
         # [!] Kiểm tra đã có dòng Chiết Khấu Bảo Lãnh hay chưa?
-        discount_order_line = order.order_line.filtered(
-            lambda sol: sol.product_id.default_code == default_code
+        discount_order_line = order.order_line._filter_service_product_lines(
+            default_code
         )
         if discount_order_line:
             # [>] Cập nhật giá sản phẩm
@@ -491,7 +489,7 @@ class SaleOrder(models.Model):
         return sum(
             line.product_uom_qty
             for line in self.order_line
-            if self.check_category_product(line.product_id.categ_id)
+            if line.product_id.categ_id.is_tyre_category
             and line.product_id.product_tmpl_id.detailed_type == "product"
         )
 
@@ -566,6 +564,9 @@ class SaleOrder(models.Model):
     def _reset_discount_agency(self, order_state=None):
         self.ensure_one()
 
+        # [>] Give back the discount amount used by the order to the partner
+        self.env["mv.partner.discount.ledger"]._reverse_entries("sale_order_id", self)
+
         # [>] Reset Bonus, Discount Fields
         if order_state == "draft":
             self._compute_partner_bonus()
@@ -577,9 +578,6 @@ class SaleOrder(models.Model):
             self.bonus_order = 0
             self.quantity_change = 0
 
-            if self.partner_agency:
-                self.partner_id.sudo().action_update_discount_amount()
-
         # [>] Remove Discount Agency Lines
         if self.state in ["draft", "cancel"]:
             self.action_clear_discount_lines()
@@ -645,6 +643,26 @@ class SaleOrder(models.Model):
         if orders_regular:
             return super(SaleOrder, orders_regular).action_confirm()
 
+    def _action_confirm(self):
+        res = super(SaleOrder, self)._action_confirm()
+
+        # [>] Debit the discount amount used by the agency orders
+        self.env["mv.partner.discount.ledger"]._debit_sale_orders(
+            self.filtered(
+                lambda so: not so.is_order_returns
+                and so.partner_agency
+                and so.bonus_order
+            )
+        )
+        return res
+
+    def _action_cancel(self):
+        res = super(SaleOrder, self)._action_cancel()
+
+        # [>] Remove the cancelled orders from the Salesperson's Analysis Report
+        self.env["salesperson.report"].sudo()._refresh_sale_orders(self.ids)
+        return res
+
     def _process_return_orders(self, orders_return):
         for order in orders_return:
             order._check_delivery_lines()
@@ -654,20 +672,11 @@ class SaleOrder(models.Model):
         for order in orders_agency:
             order._check_delivery_lines()
             order._check_not_free_qty_in_stock()
-            order.partner_id.action_update_discount_amount()
 
             # [>] Applying Discount
-            quotation_bonus_order = (
-                self.env["sale.order.line"]
-                .search(
-                    [
-                        ("order_id", "=", order.id),
-                        ("product_id.default_code", "=", "CKT"),
-                    ],
-                    limit=1,
-                )
-                .price_unit
-            )
+            quotation_bonus_order = order.order_line._filter_service_product_lines(
+                "CKT"
+            )[:1].price_unit
             if not self.env.context.get(
                 "apply_confirm"
             ) and order.partner_id.amount_currency < abs(quotation_bonus_order):
@@ -852,17 +861,9 @@ class SaleOrder(models.Model):
             "partner_id"
         ).action_update_discount_amount()  # Update partner's discount amount
         for order in orders:
-            quotation_bonus_order = (
-                self.env["sale.order.line"]
-                .search(
-                    [
-                        ("order_id", "=", order.id),
-                        ("product_id.default_code", "=", "CKT"),
-                    ],
-                    limit=1,
-                )
-                .price_unit
-            )
+            quotation_bonus_order = order.order_line._filter_service_product_lines(
+                "CKT"
+            )[:1].price_unit
             if order.partner_id.amount_currency < abs(quotation_bonus_order):
                 # [>] Xử lý chiết khấu khi có sự thay đổi hoặc đang dùng ở một đơn khác của Đại lý\
                 quotations_discount_applied = (
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
 
+from odoo.addons.mv_sale.models.product_product import DELIVERY_PRODUCT_CODE
 from odoo.addons.mv_sale.models.sale_order import GROUP_SALES_MANAGER
 
 from odoo import api, fields, models
@@ -96,31 +97,47 @@ class SaleOrderLine(models.Model):
 
     # /// CRUD Methods
 
+    # The order-level side effects run once per call over the orders of the lines,
+    # whatever the number of lines, before returning to the caller.
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(SaleOrderLine, self).create(vals_list)
+        lines.order_id._handle_discount_lines_after_write()
+        return lines
+
     def write(self, vals):
         OrderLines = super(SaleOrderLine, self).write(vals)
 
-        for so_line in self:
-            if so_line.hidden_show_qty or so_line.reward_id:
-                return OrderLines
-            else:
-                # [!] Khi có sự thay đổi về số lượng cần tính toán lại các dòng chiết khấu
-                if "product_uom_qty" in vals and vals.get("product_uom_qty"):
-                    so_line.order_id.action_clear_discount_lines()
+        # [!] Khi có sự thay đổi về số lượng cần tính toán lại các dòng chiết khấu
+        if "product_uom_qty" in vals and vals.get("product_uom_qty"):
+            so_lines = self.filtered(
+                lambda sol: not sol.hidden_show_qty and not sol.reward_id
+            )
+            so_lines.order_id.action_clear_discount_lines()
+
+        if "product_id" in vals:
+            self.order_id._handle_discount_lines_after_write()
 
         return OrderLines
 
     def unlink(self):
-        for so_line in self:
-            if (
-                so_line.product_id
-                and so_line.product_id.default_code
-                and "Delivery_" not in so_line.product_id.default_code
-            ):
-                order = so_line.order_id
-                order._compute_partner_bonus()
-                order._compute_bonus_order_line()
-
-        return super(SaleOrderLine, self).unlink()
+        delivery_product_ids = self.env["product.product"]._get_service_product_ids(
+            DELIVERY_PRODUCT_CODE
+        )
+        so_lines = self.filtered(
+            lambda sol: sol.product_id
+            and sol.product_id.default_code
+            and sol.product_id.id not in delivery_product_ids
+        )
+        so_orders = so_lines.order_id
+        so_orders._compute_partner_bonus()
+        so_orders._compute_bonus_order_line()
+
+        orders = self.order_id
+        res = super(SaleOrderLine, self).unlink()
+        orders._handle_discount_lines_after_write()
+        return res
 
     @api.ondelete(at_uninstall=False)
     def _unlink_except_confirmed(self):
@@ -153,15 +170,27 @@ class SaleOrderLine(models.Model):
             # [>] Filter the order lines based on the conditions
             # [1] The product is a service
             # [2] The product is a service with default code "CKT"
-            agency_order_lines = order.order_line.filtered(
+            agency_order_lines = order.order_line._filter_service_product_lines(
+                "CKT"
+            ).filtered(
                 lambda sol: sol.product_id.product_tmpl_id.detailed_type == "service"
-                and sol.product_id.default_code == "CKT"
             )
             return agency_order_lines
         except Exception as e:
             _logger.error(f"Failed to filter agency order lines: {e}")
             return self.env["sale.order.line"]
 
+    def _filter_service_product_lines(self, default_code):
+        """
+            Lines of the service product (e.g. "CKT", "CKBL"), compared by product ids
+        :param default_code: One of SERVICE_PRODUCT_CODES
+        :return: sale.order.line recordset
+        """
+        product_ids = self.env["product.product"]._get_service_product_ids(
+            default_code
+        )
+        return self.filtered(lambda sol: sol.product_id.id in product_ids)
+
     # /// ORM Methods
 
     @api.depends("product_id.product_tmpl_id.detailed_type", "product_id.default_code")
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class StockPicking(models.Model):
+    _inherit = "stock.picking"
+
+    def _action_done(self):
+        res = super(StockPicking, self)._action_done()
+
+        # [>] Refresh the Salesperson's Analysis Report of the delivered orders
+        self.env["salesperson.report"].sudo()._refresh_sale_orders(
+            self.filtered(lambda p: p.state == "done").sale_id.ids
+        )
+        return res
@@ -8,1019 +8,115 @@ def get_years():
     return [(str(i), str(i)) for i in range(2000, datetime.now().year + 1)]
 
 
+# [>] Rows of the report: (description, field of mv.compute.discount.line, is amount)
+DISCOUNT_REPORT_METRICS = [
+    ("Tổng số lốp đặt hàng", "quantity", False),
+    ("Tổng giá trị đơn hàng trước VAT", "amount_total", True),
+    ("Chiết khấu tháng", "month", False),
+    ("Số tiền chiết khấu", "month_money", True),
+    ("Chiết khấu 2 tháng", "two_month", False),
+    ("Số tiền chiết khấu", "two_money", True),
+    ("Chiết khấu quý", "quarter", False),
+    ("Số tiền chiết khấu", "quarter_money", True),
+    ("Chiết khấu năm ", "year", False),
+    ("Số tiền chiết khấu", "year_money", True),
+    ("Tổng chiết khấu", "total_money", True),
+]
+
+MONTH_FIELDS = [
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+]
+
+
 class DiscountReport(models.Model):
     _name = "discount.report"
     _description = _("Report Discount")
 
     line_ids = fields.One2many("discount.report.line", "parent_id")
-    partner_id = fields.Many2one("res.partner", required=1, string="Chọn Đại lý")
+    partner_id = fields.Many2one("res.partner", string="Chọn Đại lý")
+    partner_ids = fields.Many2many(
+        "res.partner",
+        string="Chọn nhiều Đại lý",
+        help="Để trống cả hai trường Đại lý để lập báo cáo cho tất cả Đại lý trong năm.",
+    )
     name = fields.Selection(get_years(), string="Chọn Năm", required=1)
 
-    def create_discount_report(
-        self,
-        description,
-        january,
-        february,
-        march,
-        april,
-        may,
-        june,
-        july,
-        august,
-        september,
-        october,
-        november,
-        december,
-    ):
-        self.env["discount.report.line"].create(
-            {
-                "parent_id": self.id,
-                "partner_id": self.partner_id.id,
-                "description": description,
-                "january": january,
-                "february": february,
-                "march": march,
-                "april": april,
-                "may": may,
-                "june": june,
-                "july": july,
-                "august": august,
-                "september": september,
-                "october": october,
-                "november": november,
-                "december": december,
-            }
-        )
-
     def convert_vnd(self, amount):
         a = format(amount, ",.0f")
         return a
 
     def action_confirm(self):
-        self.line_ids = False
-        compute_discount_ids = self.env["mv.compute.discount"].search(
-            [("year", "=", self.name)]
-        )
-        compute_discount_line_ids = compute_discount_ids.line_ids.filtered(
-            lambda x: x.partner_id == self.partner_id
-        )
-        self.create_discount_report(
-            "Tổng số lốp đặt hàng",
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("quantity")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("quantity")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Tổng giá trị đơn hàng trước VAT",
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("amount_total")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("amount_total")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Chiết khấu tháng",
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("month")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Số tiền chiết khấu",
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("month_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("month_money")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Chiết khấu 2 tháng",
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("two_month")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("two_month")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Số tiền chiết khấu",
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("two_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("two_money")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Chiết khấu quý",
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("quarter")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("quarter")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Số tiền chiết khấu",
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("quarter_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("quarter_money")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Chiết khấu năm ",
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("year")
-                )
-            ),
-            str(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("year")
-                )
-            ),
-        )
-        self.create_discount_report(
-            "Số tiền chiết khấu",
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("year_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("year_money")
-                )
-            ),
+        for report in self:
+            report.line_ids = False
+            partner_ids = (report.partner_id | report.partner_ids).ids
+            data = report._fetch_discount_report_data(int(report.name), partner_ids)
+            report.env["discount.report.line"].create(
+                [
+                    report._prepare_discount_report_line(partner_id, metric, values)
+                    for partner_id, values in data.items()
+                    for metric in DISCOUNT_REPORT_METRICS
+                ]
+            )
+
+    def _prepare_discount_report_line(self, partner_id, metric, values):
+        description, field_name, is_amount = metric
+        vals = {
+            "parent_id": self.id,
+            "partner_id": partner_id,
+            "description": description,
+        }
+        for month, month_field in enumerate(MONTH_FIELDS, start=1):
+            value = values.get("%s_%s" % (field_name, month)) or 0
+            vals[month_field] = self.convert_vnd(value) if is_amount else str(value)
+        return vals
+
+    def _fetch_discount_report_data(self, year, partner_ids=None):
+        """
+            Pivots the discount lines of the year by month in a single query.
+        :param year: The year of the report
+        :param partner_ids: The partners of the report, all partners if empty
+        :return: A dict {partner_id: {"<field>_<month>": value}}
+        """
+        self.env["mv.compute.discount.line"].flush_model()
+        columns = ",\n".join(
+            "SUM(cdl.{field}) FILTER (WHERE cdl.month_parent = {month}) "
+            "AS {field}_{month}".format(field=field_name, month=month)
+            for _description, field_name, _is_amount in DISCOUNT_REPORT_METRICS
+            for month in range(1, 13)
         )
-        self.create_discount_report(
-            "Tổng chiết khấu",
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 1
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 2
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 3
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 4
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 5
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 6
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 7
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 8
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 9
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 10
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 11
-                    ).mapped("total_money")
-                )
-            ),
-            self.convert_vnd(
-                sum(
-                    compute_discount_line_ids.filtered(
-                        lambda x: x.month_parent == 12
-                    ).mapped("total_money")
-                )
+        query = """
+            SELECT cdl.partner_id,
+                   {columns}
+            FROM mv_compute_discount_line cdl
+                JOIN res_partner partner ON partner.id = cdl.partner_id
+            WHERE cdl.parent_id IS NOT NULL
+              AND cdl.year_parent = %(year)s
+              {partner_clause}
+            GROUP BY cdl.partner_id, partner.name
+            ORDER BY partner.name, cdl.partner_id;
+        """.format(
+            columns=columns,
+            partner_clause=(
+                "AND cdl.partner_id = ANY(%(partner_ids)s)" if partner_ids else ""
             ),
         )
+        self.env.cr.execute(query, {"year": year, "partner_ids": partner_ids})
+        data = {row.pop("partner_id"): row for row in self.env.cr.dictfetchall()}
+        # Keep the selected partners without any discount line in the report
+        for partner_id in partner_ids or []:
+            data.setdefault(partner_id, {})
+        return data
 
     def action_view_report(self):
         view_id = self.env.ref("mv_sale.mv_report_discount_view_form").id
@@ -6,7 +6,7 @@ class DiscountReportLine(models.Model):
     _name = _description = "discount.report.line"
 
     parent_id = fields.Many2one("discount.report")
-    partner_id = fields.Many2one("res.partner", related="parent_id.partner_id")
+    partner_id = fields.Many2one("res.partner", string="Đại lý")
     description = fields.Char(string=" ")
     january = fields.Char(string="Tháng 1")
     february = fields.Char(string="Tháng 2")
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+import logging
+
 from odoo import _, api, fields, models, tools
 
+_logger = logging.getLogger(__name__)
+
 
 class SalespersonReport(models.Model):
     _name = "salesperson.report"
@@ -51,7 +55,9 @@ class SalespersonReport(models.Model):
     # ==================================
 
     @api.model
-    def _sql_orders(self):
+    def _sql_orders(self, sale_ids=None):
+        # [>] Restrict to the orders given as "sale_ids" parameter (incremental refresh)
+        sale_clause = "AND so.id = ANY(%(sale_ids)s)" if sale_ids else ""
         return f"""
             SELECT so.id                             AS sale_id,
                    so.date_order::DATE               AS sale_date_order,
@@ -69,28 +75,28 @@ class SalespersonReport(models.Model):
                      INNER JOIN res_partner partner ON (so.partner_id = partner.id AND partner.is_agency = TRUE)
                      INNER JOIN res_partner partner_shipping ON (so.partner_shipping_id = partner_shipping.id)
             WHERE so.state = 'sale'
-              AND so.is_order_returns = FALSE 
-                OR so.is_order_returns IS NULL
+              AND (so.is_order_returns = FALSE OR so.is_order_returns IS NULL)
+              {sale_clause}
         """
 
-    def _query(self):
+    def _query(self, sale_ids=None):
         return f"""
               WITH 
-              {self._with_clause()}
+              {self._with_clause(sale_ids)}
               {self._select_clause()}
               {self._from_clause()}
               {self._where_clause()}
               {self._group_by_clause()}
         """
 
-    def _with_clause(self):
+    def _with_clause(self, sale_ids=None):
         att_ma_gai = self.env.context.get("attribute_ma_gai", "ma_gai")
         att_size_lop = self.env.context.get("attribute_size_lop", "size_lop")
         att_rim_diameter_inch = self.env.context.get(
             "attribute_rim_diameter_inch", "rim_diameter_inch"
         )
         return f"""
-            orders AS ({self._sql_orders()}),
+            orders AS ({self._sql_orders(sale_ids)}),
             order_lines AS (SELECT so.sale_id,
                                    so.sale_date_order,
                                    so.sale_day_order,
@@ -107,7 +113,8 @@ class SalespersonReport(models.Model):
                                    pt.id                AS product_template_id,
                                    pt.country_of_origin AS product_country_of_origin,
                                    stl.name             AS serial_number,
-                                   stl.ref              AS qrcode
+                                   stl.ref              AS qrcode,
+                                   sml.id               AS move_line_id
                              FROM sale_order_line sol
                                   JOIN orders so ON so.sale_id = sol.order_id
                                   JOIN product_product pp ON pp.id = sol.product_id
@@ -142,8 +149,24 @@ class SalespersonReport(models.Model):
 
     def _select_clause(self):
         return """
-            SELECT ROW_NUMBER() OVER () AS id,
-                   line.*,
+            SELECT MIN(line.move_line_id) AS id,
+                   line.sale_id,
+                   line.sale_date_order,
+                   line.sale_day_order,
+                   line.sale_month_order,
+                   line.sale_year_order,
+                   line.partner_id,
+                   line.partner_company_registry,
+                   line.street,
+                   line.wards_id,
+                   line.district_id,
+                   line.state_id,
+                   line.country_id,
+                   line.product_id,
+                   line.product_template_id,
+                   line.product_country_of_origin,
+                   line.serial_number,
+                   line.qrcode,
                    pa.product_att_size_lop,
                    pa.product_att_ma_gai,
                    pa.product_att_rim_diameter_inch
@@ -182,8 +205,95 @@ class SalespersonReport(models.Model):
                      pa.product_att_rim_diameter_inch
         """
 
+    # ==================================
+    # Materialized Table (partitioned by sale year)
+    # ==================================
+
     def init(self):
-        tools.drop_view_if_exists(self._cr, self._table)
         self._cr.execute(
-            "CREATE OR REPLACE VIEW %s AS (%s);" % (self._table, self._query())
+            "SELECT relkind FROM pg_class WHERE relname = %s", [self._table]
+        )
+        kind = self._cr.fetchone()
+        if kind and kind[0] in ("p", "r"):
+            self._cr.execute("DROP TABLE %s CASCADE" % self._table)
+        else:
+            tools.drop_view_if_exists(self._cr, self._table)
+
+        # [>] The report is stored in a table partitioned by the date of the orders,
+        # one partition per year, and is kept up to date when pickings are done.
+        self._cr.execute(
+            "CREATE TEMPORARY TABLE %s_tmp AS (%s) WITH NO DATA"
+            % (self._table, self._query())
         )
+        self._cr.execute(
+            """
+            CREATE TABLE {table} (LIKE {table}_tmp) PARTITION BY RANGE (sale_date_order);
+            CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+            CREATE INDEX {table}_id_index ON {table} (id);
+            CREATE INDEX {table}_sale_id_index ON {table} (sale_id);
+            CREATE INDEX {table}_partner_id_index ON {table} (partner_id);
+            DROP TABLE {table}_tmp;
+            """.format(
+                table=self._table
+            )
+        )
+        self._rebuild_report()
+
+    @api.model
+    def _create_year_partitions(self, sale_ids=None):
+        """
+            Creates the missing yearly partitions for the confirmed orders.
+        """
+        query = """
+            SELECT DISTINCT EXTRACT(YEAR FROM date_order)::INT
+            FROM sale_order
+            WHERE state = 'sale'
+        """
+        params = {}
+        if sale_ids:
+            query += " AND id = ANY(%(sale_ids)s)"
+            params["sale_ids"] = list(sale_ids)
+        self._cr.execute(query, params)
+        for (year,) in self._cr.fetchall():
+            self._cr.execute(
+                """
+                CREATE TABLE IF NOT EXISTS {table}_{year} PARTITION OF {table}
+                FOR VALUES FROM ('{year}-01-01') TO ('{next_year}-01-01')
+                """.format(
+                    table=self._table, year=year, next_year=year + 1
+                )
+            )
+
+    @api.model
+    def _rebuild_report(self):
+        self.env.flush_all()
+        # DELETE instead of TRUNCATE: TRUNCATE takes an ACCESS EXCLUSIVE lock and would
+        # block the readers of the report until the rebuild is committed
+        self._cr.execute("DELETE FROM %s" % self._table)
+        self._create_year_partitions()
+        self._cr.execute("INSERT INTO %s (%s)" % (self._table, self._query()))
+
+    @api.model
+    def _refresh_sale_orders(self, sale_ids):
+        """
+            Refreshes the rows of the given orders only.
+        :param sale_ids: A list of sale.order ids
+        """
+        if not sale_ids:
+            return
+
+        self.env.flush_all()
+        params = {"sale_ids": list(sale_ids)}
+        self._cr.execute(
+            "DELETE FROM %s WHERE sale_id = ANY(%%(sale_ids)s)" % self._table, params
+        )
+        self._create_year_partitions(sale_ids)
+        self._cr.execute(
+            "INSERT INTO %s (%s)" % (self._table, self._query(sale_ids=sale_ids)),
+            params,
+        )
+
+    @api.model
+    def _cron_rebuild_report(self):
+        self._rebuild_report()
+        _logger.info("Rebuilt %s", self._table)
@@ -221,9 +221,7 @@ class MvWizardDeliveryCarrierAndDiscountPolicyApply(models.TransientModel):
     def _get_mv_discount_product(self):
         """Return product.product used for moveoplus discount line"""
         self.ensure_one()
-        discount_product = self.env["product.product"].search(
-            [("default_code", "=", "CKT")], limit=1
-        )
+        discount_product = self.env["product.product"]._get_service_product("CKT")
         if not discount_product:
             self.company_id.sale_discount_product_id = self.env[
                 "product.product"
@@ -276,9 +274,7 @@ class MvWizardDeliveryCarrierAndDiscountPolicyApply(models.TransientModel):
                 if wizard.discount_amount_remaining > 0
                 else wizard.discount_amount_apply
             )
-            order.order_line.filtered(
-                lambda line: line.product_id.default_code == "CKT"
-            ).write(
+            order.order_line._filter_service_product_lines("CKT").write(
                 {
                     "price_unit": (
                         -total_order_discount_CKT
@@ -297,9 +293,7 @@ class MvWizardDeliveryCarrierAndDiscountPolicyApply(models.TransientModel):
                 * order.partner_id.discount_bank_guarantee
                 / DISCOUNT_PERCENTAGE_DIVISOR
             )
-            order.order_line.filtered(
-                lambda line: line.product_id.default_code == "CKBL"
-            ).write({"price_unit": -total_order_discount_CKBL})
+            order.order_line._filter_service_product_lines("CKBL").write({"price_unit": -total_order_discount_CKBL})
 
         order._update_programs_and_rewards()
         order._auto_apply_rewards()
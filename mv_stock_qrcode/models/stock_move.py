@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from psycopg2 import errors
+
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
 
@@ -27,16 +29,17 @@ class StockMove(models.Model):
 
     @api.depends("product_id", "inventory_period_id")
     def _auto_get_number_start(self):
+        moves = self.filtered(lambda m: m.product_id and m.inventory_period_id)
+        last_numbers = self.env["mv.stock.qrcode.counter"]._get_last_numbers(
+            {(move.product_id.id, move.inventory_period_id.id) for move in moves}
+        )
         for move in self:
-            if move and move.product_id and move.inventory_period_id:
-                move.number_start = (
-                    self._get_next_number_start(
-                        move.product_id.id, move.inventory_period_id.id
-                    )
-                    or 1
+            move.number_start = (
+                last_numbers.get(
+                    (move.product_id.id, move.inventory_period_id.id), 0
                 )
-            else:
-                move.number_start = 1
+                + 1
+            )
 
     @api.depends("move_line_ids")
     def _compute_number_qrcode_input_limited(self):
@@ -93,68 +96,55 @@ class StockMove(models.Model):
         elif not week_number_id:
             raise ValidationError(_("Week Number is not empty!"))
 
+        last_numbers = self.env["mv.stock.qrcode.counter"]._get_last_numbers(
+            [(product_id, week_number_id)]
+        )
+        return last_numbers.get((product_id, week_number_id), 0) + 1
+
+    def _get_used_qr_code_suffixes(self, code_prefix):
+        self.ensure_one()
+        self.env["stock.move.line"].flush_model(
+            ["product_id", "inventory_period_id", "qr_code_prefix", "qr_code_suffix"]
+        )
         self._cr.execute(
             """
-            SELECT sml.picking_id,
-                       sml.move_id,
-                       sml.lot_id,
-                       sml.lot_name,
-                       pp.id                                             AS product_id,
-                       pp.barcode                                   AS product_barcode,
-                       sml.inventory_period_name          AS week_number,
-                       sml.qr_code,
-                       sml.quantity
-                FROM stock_move_line sml
-                         JOIN product_product pp ON pp.id = sml.product_id
-                         JOIN product_template pt ON pt.id = pp.product_tmpl_id AND pt.detailed_type = 'product'
-                WHERE sml.product_id = %s
-                  AND sml.inventory_period_id = %s
-                GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9;
-        """
-            % (product_id, week_number_id)
+            SELECT qr_code_suffix
+            FROM stock_move_line
+            WHERE product_id = %s
+              AND inventory_period_id = %s
+              AND qr_code_prefix = %s
+              AND qr_code_suffix IS NOT NULL;
+            """,
+            [self.product_id.id, self.inventory_period_id.id, code_prefix],
         )
-        move_line_ids = [
-            {
-                "week_number": line.get("week_number"),
-                "product_id": line.get("product_id"),
-                "product_barcode": line.get("product_barcode"),
-                "lot_serial_number": line.get("lot_name"),
-                "stock_qrcode": line.get("qr_code"),
-                "stock_quantity": line.get("quantity"),
-            }
-            for line in self._cr.dictfetchall()
-        ]
-        if move_line_ids:
-            return len(move_line_ids) + 1
-        else:
-            return len(move_line_ids)
-
-    def _get_next_unique_qr_code(self, next_unique):
-        while True:
-            code_prefix = self.base_qrcode
-            code_suffix = str(next_unique).zfill(5)
-            qrcode = "{prefix}{suffix}".format(prefix=code_prefix, suffix=code_suffix)
-            move_line_exist = self.env["stock.move.line"].search(
-                [
-                    ("product_id", "=", self.product_id.id),
-                    ("inventory_period_id", "=", self.inventory_period_id.id),
-                    ("qr_code_prefix", "=", code_prefix),
-                    ("qr_code_suffix", "=", code_suffix),
-                ],
-                limit=1,
-            )
+        return {suffix for (suffix,) in self._cr.fetchall()}
 
-            if not move_line_exist:
-                return 1, qrcode, code_prefix, code_suffix
+    def _get_next_unique_qr_codes(self, start, number_to_generate):
+        """
+            Hands out the next free QR-Codes from :param start:, the used suffixes of the
+            product/week are read at once.
+        :return: A list of tuple (quantity, qr_code, qr_code_prefix, qr_code_suffix)
+        """
+        self.ensure_one()
+        code_prefix = self.base_qrcode
+        used_suffixes = self._get_used_qr_code_suffixes(code_prefix)
 
+        qrcodes = []
+        next_unique = start
+        while len(qrcodes) < number_to_generate:
+            code_suffix = str(next_unique).zfill(5)
+            if code_suffix not in used_suffixes:
+                qrcode = "{prefix}{suffix}".format(
+                    prefix=code_prefix, suffix=code_suffix
+                )
+                qrcodes.append((1, qrcode, code_prefix, code_suffix))
             next_unique += 1
+        return qrcodes
 
     def _add_qrcode_move_line_to_vals_list(self, start, number_to_generate):
         return [
-            self._prepare_move_line_vals_for_qrcode(
-                *self._get_next_unique_qr_code(start + num)
-            )
-            for num in range(int(number_to_generate))
+            self._prepare_move_line_vals_for_qrcode(*qrcode)
+            for qrcode in self._get_next_unique_qr_codes(start, int(number_to_generate))
         ]
 
     def _prepare_move_line_vals_for_qrcode(
@@ -228,8 +218,22 @@ class StockMove(models.Model):
             start=self.number_start, number_to_generate=number_generate
         )
         if vals_list:
-            self.env["stock.move.line"].with_context(qrcode_generate=True).create(
-                vals_list
+            try:
+                with self.env.cr.savepoint():
+                    self.env["stock.move.line"].with_context(
+                        qrcode_generate=True
+                    ).create(vals_list)
+            except errors.UniqueViolation:
+                # The same QR-Codes were generated by another picking in the meantime
+                raise UserError(
+                    _(
+                        "QR-Codes have just been generated by another user, please try again!"
+                    )
+                )
+            self.env["mv.stock.qrcode.counter"]._bump(
+                self.product_id.id,
+                self.inventory_period_id.id,
+                max(int(vals["qr_code_suffix"]) for vals in vals_list),
             )
 
         # RESET Data
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+import logging
+
 from odoo import api, fields, models
 
+_logger = logging.getLogger(__name__)
+
 
 class StockMoveLine(models.Model):
     _inherit = "stock.move.line"
@@ -14,6 +18,7 @@ class StockMoveLine(models.Model):
         string="QR-Code Suffix",
         help="Fix the number at the last of QR-Code, Size default = 5 (E.g: 00001)",
         readonly=True,
+        copy=False,
     )
 
     # INHERIT Fields:
@@ -23,6 +28,34 @@ class StockMoveLine(models.Model):
         help="Make this field can call by `search_read()`",
     )
 
+    def init(self):
+        super(StockMoveLine, self).init()
+        self._cr.execute(
+            """
+            SELECT 1
+            FROM stock_move_line
+            WHERE qr_code_suffix IS NOT NULL
+            GROUP BY product_id, inventory_period_id, qr_code_prefix, qr_code_suffix
+            HAVING COUNT(*) > 1
+            LIMIT 1;
+            """
+        )
+        if self._cr.fetchone():
+            _logger.warning(
+                "Duplicated QR-Codes found in stock_move_line, "
+                "the unique index on QR-Code suffixes is not created."
+            )
+            return
+
+        # [!] A QR-Code suffix can only be used once by product/week/prefix
+        self._cr.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS stock_move_line_qr_code_suffix_uniq
+            ON stock_move_line (product_id, inventory_period_id, qr_code_prefix, qr_code_suffix)
+            WHERE qr_code_suffix IS NOT NULL;
+            """
+        )
+
     def _get_fields_stock_barcode(self):
         fields = super(StockMoveLine, self)._get_fields_stock_barcode()
         fields += ["qr_code_prefix", "qr_code_suffix"]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, tools, _
+
+
+class StockQrcodeCounter(models.Model):
+    _name = "mv.stock.qrcode.counter"
+    _description = _("QR-Code Counter by Product and Week Number")
+    _log_access = False
+
+    product_id = fields.Many2one(
+        "product.product", required=True, readonly=True, ondelete="cascade"
+    )
+    inventory_period_id = fields.Many2one(
+        "inventory.period", required=True, readonly=True, ondelete="cascade"
+    )
+    last_number = fields.Integer(
+        readonly=True, help="The last QR-Code suffix generated for the product/week"
+    )
+
+    _sql_constraints = [
+        (
+            "product_period_uniq",
+            "UNIQUE(product_id, inventory_period_id)",
+            "Only one QR-Code counter by Product and Week Number!",
+        )
+    ]
+
+    def init(self):
+        self._backfill_counters()
+
+    @api.model
+    def _backfill_counters(self, product_ids=None):
+        """
+            Seeds the counters from the QR-Code suffixes already stored on the move lines.
+        :param product_ids: Restrict to these products, all products if empty
+        """
+        if not tools.column_exists(self._cr, "stock_move_line", "qr_code_suffix"):
+            return
+
+        product_clause = "AND product_id = ANY(%(product_ids)s)" if product_ids else ""
+        self._cr.execute(
+            f"""
+            INSERT INTO mv_stock_qrcode_counter (product_id, inventory_period_id, last_number)
+            SELECT product_id, inventory_period_id, MAX(qr_code_suffix::INT)
+            FROM stock_move_line
+            WHERE inventory_period_id IS NOT NULL
+              AND qr_code_suffix ~ '^[0-9]+$'
+              {product_clause}
+            GROUP BY product_id, inventory_period_id
+            ON CONFLICT (product_id, inventory_period_id) DO UPDATE
+                SET last_number = GREATEST(mv_stock_qrcode_counter.last_number, EXCLUDED.last_number);
+            """,
+            {"product_ids": list(product_ids or [])},
+        )
+
+    @api.model
+    def _get_last_numbers(self, keys):
+        """
+            Reads the counters of the (product_id, inventory_period_id) pairs at once.
+        :return: A dict {(product_id, inventory_period_id): last_number}
+        """
+        if not keys:
+            return {}
+
+        self.flush_model()
+        self._cr.execute(
+            """
+            SELECT product_id, inventory_period_id, last_number
+            FROM mv_stock_qrcode_counter
+            WHERE (product_id, inventory_period_id) IN %s;
+            """,
+            [tuple(keys)],
+        )
+        return {
+            (product_id, period_id): last_number
+            for product_id, period_id, last_number in self._cr.fetchall()
+        }
+
+    @api.model
+    def _bump(self, product_id, inventory_period_id, number):
+        """
+            Moves the counter of the product/week forward to :param number: (never back).
+        """
+        self._cr.execute(
+            """
+            INSERT INTO mv_stock_qrcode_counter (product_id, inventory_period_id, last_number)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (product_id, inventory_period_id) DO UPDATE
+                SET last_number = GREATEST(mv_stock_qrcode_counter.last_number, EXCLUDED.last_number);
+            """,
+            [product_id, inventory_period_id, number],
+        )
+        self.invalidate_model(["last_number"])
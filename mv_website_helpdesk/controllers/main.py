@@ -44,6 +44,11 @@ IS_NOT_AGENCY = "is_not_agency"
 IS_EMPTY = "is_empty"
 CODE_NOT_FOUND = "code_not_found"
 CODE_ALREADY_REGISTERED = "code_already_registered"
+CODE_VALID = "valid"
+INVALID_TICKET_TYPE = "invalid_ticket_type"
+
+# Maximum number of codes validated by one call of the scanner endpoint
+MAX_SCANNED_CODES = 500
 
 
 class MVWebsiteHelpdesk(http.Controller):
@@ -235,6 +240,97 @@ class MVWebsiteHelpdesk(http.Controller):
                 code_input if not filtered_error_messages else filtered_error_messages
             )
 
+    @http.route("/mv_website_helpdesk/validate_codes", type="json", auth="public")
+    def validate_scanned_codes(self, codes, ticket_type=False):
+        """
+        Lightweight validation of the codes scanned since the last call, answered
+        from the Warranty Activation Registry in a single query.
+        :return: {"codes": [{"code": str, "status": str, "message": str}]}, or
+            {"codes": [], "status": str, "message": str} when the request is invalid
+        """
+        # Same extraction as the form submission: the numbers of the scanned values
+        if isinstance(codes, list):
+            codes = " ".join(str(code) for code in codes if isinstance(code, (int, str)))
+        codes = request.env["helpdesk.ticket"].convert_to_list_codes(codes)
+        codes = list(dict.fromkeys(codes))[:MAX_SCANNED_CODES]
+        if not codes:
+            return {"codes": []}
+
+        ticket_type_code = False
+        if ticket_type:
+            try:
+                ticket_type_id = int(ticket_type)
+            except (TypeError, ValueError):
+                ticket_type_id = 0
+            ticket_type_record = (
+                request.env["helpdesk.ticket.type"].sudo().browse(ticket_type_id).exists()
+                if ticket_type_id > 0
+                else False
+            )
+            if not ticket_type_record:
+                return {
+                    "codes": [],
+                    "status": INVALID_TICKET_TYPE,
+                    "message": "Loại phiếu không hợp lệ, vui lòng chọn lại!",
+                }
+            ticket_type_code = ticket_type_record.code
+
+        # Sub-Dealer and End-User activation tickets by code
+        activations = {}
+        registry_rows = (
+            request.env["mv.helpdesk.activation.registry"].sudo()._lookup(codes)
+        )
+        for row in registry_rows:
+            sub_dealer_ticket_id, end_user_ticket_id = activations.get(
+                row["code"], (False, False)
+            )
+            activations[row["code"]] = (
+                sub_dealer_ticket_id or row["sub_dealer_ticket_id"],
+                end_user_ticket_id or row["end_user_ticket_id"],
+            )
+
+        is_anonymous = request.env.user._is_public()
+        return {
+            "codes": [
+                self._get_scanned_code_status(
+                    code, activations, ticket_type_code, is_anonymous
+                )
+                for code in codes
+            ]
+        }
+
+    def _get_scanned_code_status(
+        self, code, activations, ticket_type_code, is_anonymous
+    ):
+        if code not in activations:
+            return {
+                "code": code,
+                "status": CODE_NOT_FOUND,
+                "message": f"Mã {code} không tồn tại trên hệ thống hoặc chưa cập nhật.",
+            }
+
+        # Same rules as _validate_codes: any activation blocks a warranty activation
+        # ticket, otherwise the code must not be activated by both types already
+        ticket_ids = [ticket_id for ticket_id in activations[code] if ticket_id]
+        if ticket_ids and (
+            len(ticket_ids) == 2
+            or ticket_type_code in [SUB_DEALER_CODE, END_USER_CODE]
+        ):
+            if is_anonymous:
+                message = f"Mã {code} đã được đăng ký cho đơn vị khác!"
+            else:
+                message = (
+                    f"Mã {code} đã trùng với Ticket khác, phiếu có mã là "
+                    f"({', '.join('#%s' % ticket_id for ticket_id in ticket_ids)})."
+                )
+            return {
+                "code": code,
+                "status": CODE_ALREADY_REGISTERED,
+                "message": message,
+            }
+
+        return {"code": code, "status": CODE_VALID, "message": ""}
+
     def _validate_codes(self, codes, ticket_type, partner, error_messages, field_name):
         TicketProductMoves = request.env["mv.helpdesk.ticket.product.moves"].sudo()
 
@@ -64,35 +64,34 @@ export class ScannerDialog extends Component {
 
         const listCode = this._cleanAndConvertCodesToArray(code);
         const $ticketType = $("#helpdesk_warranty_select_ticket_type_id");
-        const $partnerName = $("#helpdeskWarrantyInputPartnerName");
-        const $partnerEmail = $("#helpdeskWarrantyInputPartnerEmail");
-        const $telNumberActivation = $("#helpdesk_warranty_input_tel_activation");
         try {
-            const res = await this.rpc("/mv_website_helpdesk/check_scanned_code", {
+            // Only the newly scanned codes are sent, the server answers a status by code
+            const res = await this.rpc("/mv_website_helpdesk/validate_codes", {
                 codes: listCode,
                 ticket_type: $ticketType.val(),
-                partner_name: $partnerName.val(),
-                partner_email: $partnerEmail.val(),
-                tel_activation: $telNumberActivation.val(),
-                by_pass_check: true,
             });
 
-            if (!res || res.length === 0) return;
+            if (!res || !res.codes) return;
+            if (res.status === "invalid_ticket_type") {
+                this.notificationService.add(_t(res.message), {
+                    type: "warning",
+                });
+                return;
+            }
 
-            for (const [keyName, keyMessage] of res) {
-                if (["is_empty", "code_not_found"].includes(keyName)) {
-                    this.notificationService.add(_t(keyMessage), {
+            const inputData = document.getElementById("codesInputByScanner");
+            for (const {code: scannedCode, status, message} of res.codes) {
+                if (status === "code_not_found") {
+                    this.notificationService.add(_t(message), {
                         type: "warning",
                     });
-                    return;
-                } else {
-                    const inputData = document.getElementById("codesInputByScanner");
-                    // Use the state to store the codes instead of manipulating the DOM directly
-                    if (!inputData.value.includes(res)) {
-                        inputData.value += res + ",";
-                    }
-                    this.beep(50, 1000, 200);
+                    continue;
+                }
+                // Use the state to store the codes instead of manipulating the DOM directly
+                if (!inputData.value.includes(scannedCode)) {
+                    inputData.value += scannedCode + ",";
                 }
+                this.beep(50, 1000, 200);
             }
         } catch (e) {
             console.error("Failed to scan barcode: ", e);
@@ -21,12 +21,32 @@ class MoveoplusWebsiteSale(WebsiteSale):
     def _cart_values(self, **post):
         _logger.debug(f"MOVEO+ Cart Value [POST]: {post}")
         order = request.website.sale_get_order()
-        discount_amount_invalid = order.partner_id.amount_currency < order.bonus_order
+        if not order:
+            return {
+                "is_update": False,
+                "delivery_set": False,
+                "discount_agency_set": False,
+                "discount_amount_invalid": False,
+                "discount_amount_maximum": 0.0,
+                "discount_amount_remaining": 0.0,
+                "discount_amount_applied": 0.0,
+                "bank_guarantee_set": False,
+                "total_discount_CKBL": 0.0,
+                "partner_agency_set": False,
+                "total_discount_agency": 0.0,
+                "partner_white_agency_set": False,
+                "total_discount_white_agency": 0.0,
+                "partner_southern_agency_set": False,
+                "total_discount_southern_agency": 0.0,
+            }
+
+        partner_amount = order.partner_id.amount_currency
+        discount_amount_invalid = partner_amount < order.bonus_order
         discount_amount_maximum = order.bonus_max
         discount_amount_applied = (
             order.bonus_order if not discount_amount_invalid else 0.0
         )
-        total_remaining = order.partner_id.amount_currency - order.bonus_order
+        total_remaining = partner_amount - order.bonus_order
         discount_amount_remaining = total_remaining if total_remaining > 0 else 0.0
 
         # /// Chiết khấu bảo lãnh ngân hàng
@@ -37,21 +57,21 @@ class MoveoplusWebsiteSale(WebsiteSale):
         )
         # /// Chiết khấu Đại lý
         total_discount_agency = sum(
-            order.order_line.filtered(
-                lambda line: line.product_id.default_code == "CKSLL"
-            ).mapped("price_unit")
+            order.order_line._filter_service_product_lines("CKSLL").mapped(
+                "price_unit"
+            )
         )
         # /// Chiết khấu Đại lý vùng trắng
         total_discount_white_agency = sum(
-            order.order_line.filtered(
-                lambda line: line.product_id.default_code == "CKSLVT"
-            ).mapped("price_unit")
+            order.order_line._filter_service_product_lines("CKSLVT").mapped(
+                "price_unit"
+            )
         )
         # /// Chiết khấu Đại lý miền Nam
         total_discount_southern_agency = sum(
-            order.order_line.filtered(
-                lambda line: line.product_id.default_code == "CKSLMN"
-            ).mapped("price_unit")
+            order.order_line._filter_service_product_lines("CKSLMN").mapped(
+                "price_unit"
+            )
         )
         values_update = {
             "is_update": order.recompute_discount_agency,
@@ -86,17 +106,6 @@ class MoveoplusWebsiteSale(WebsiteSale):
         }
         return values_update
 
-    @http.route()
-    def cart(self, access_token=None, revive="", **post):
-        order = request.website.sale_get_order()
-        order._compute_partner_bonus()
-        order._compute_bonus_order_line()
-
-        if order.partner_id.is_agency:
-            order.partner_id.action_update_discount_amount()
-
-        return super().cart(access_token=access_token, revive=revive, **post)
-
     # /// Checkout
 
     def checkout_values(self, order, **kw):
@@ -211,9 +220,7 @@ class MoveoplusWebsiteSale(WebsiteSale):
                     if discount_amount_remaining > 0
                     else discount_amount_apply
                 )
-                order.order_line.filtered(
-                    lambda line: line.product_id.default_code == "CKT"
-                ).write(
+                order.order_line._filter_service_product_lines("CKT").write(
                     {
                         "price_unit": (
                             -total_order_discount_CKT
@@ -231,9 +238,7 @@ class MoveoplusWebsiteSale(WebsiteSale):
                     * order.partner_id.discount_bank_guarantee
                     / DISCOUNT_PERCENTAGE_DIVISOR
                 )
-                order.order_line.filtered(
-                    lambda line: line.product_id.default_code == "CKBL"
-                ).write({"price_unit": -total_order_discount_CKBL})
+                order.order_line._filter_service_product_lines("CKBL").write({"price_unit": -total_order_discount_CKBL})
 
         order.with_context(
             applying_partner_discount=True
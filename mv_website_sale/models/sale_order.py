@@ -10,7 +10,7 @@ class SaleOrder(models.Model):
     def check_show_warning(self):
         order_line = self.order_line.filtered(
             lambda line: line.product_id.product_tmpl_id.detailed_type == "product"
-            and self.check_category_product(line.product_id.categ_id)
+            and line.product_id.categ_id.is_tyre_category
         )
         return (
             len(order_line) >= 1
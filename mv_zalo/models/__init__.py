@@ -10,5 +10,7 @@ from . import res_users
 from . import sale_order
 from . import sale_order_line
 from . import stock_picking
+from . import zalo_config
 from . import zalo_log_request
 from . import zns_templates
+from . import zns_message_queue
@@ -17,6 +17,7 @@ from odoo.addons.mv_zalo.zalo_oa_functional import (
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools import split_every
 
 _logger = logging.getLogger(__name__)
 
@@ -171,7 +172,9 @@ class AccountMove(models.Model):
 
     # /// CRON JOB ///
     @api.model
-    def _cron_notification_invoice_date_due(self, date_before=False, phone=False):
+    def _cron_notification_invoice_date_due(
+        self, date_before=False, phone=False, chunk_size=1000
+    ):
         def sanitize_phone(phonenumber=phone):
             digits = "".join(filter(str.isdigit, phonenumber))
             if len(digits) not in [10, 11]:
@@ -187,9 +190,7 @@ class AccountMove(models.Model):
             _logger.error("ZNS Payment Notification Template not found.")
             return
 
-        zns_template = self.env["zns.template"].search(
-            [("template_id", "=", template_id)], limit=1
-        )
+        zns_template = self.env["zns.template"]._get_by_template_id(template_id)
         if not zns_template:
             _logger.error(f"ZNS Template with ID {template_id} not found.")
             return
@@ -198,49 +199,107 @@ class AccountMove(models.Model):
             f">>> ZNS Template: [{zns_template.template_id}] {zns_template.template_name} <<<"
         )
 
-        zns_sample_data = self.env["zns.template.sample.data"].search(
-            [("zns_template_id", "=", zns_template.id)]
-        )
-        if not zns_sample_data:
+        if not zns_template.sample_data_ids:
             _logger.error("ZNS Template Sample Data not found.")
             return
 
         due_date = fields.Date.today() - timedelta(
             days=int(date_before) if date_before else 2
         )
-        journal_entries = self.env["account.move"].search(
-            [
-                ("state", "=", "posted"),
-                ("payment_state", "=", "not_paid"),
-                ("zns_notification_sent", "=", False),
-                ("invoice_date_due", "=", due_date),
-            ]
+        journal_entry_ids = (
+            self.env["account.move"]
+            .search(
+                [
+                    ("state", "=", "posted"),
+                    ("payment_state", "=", "not_paid"),
+                    ("zns_notification_sent", "=", False),
+                    ("invoice_date_due", "=", due_date),
+                ]
+            )
+            .ids
         )
-        for entry in journal_entries:
-            valid_phone_number = (
-                sanitize_phone(entry.partner_id.phone) if not phone else testing_phone
+        # [>] Messages are only enqueued here, they are sent by the ZNS queue worker
+        queued_ids = set(
+            self.env["mv.zns.message.queue"]._get_queued_res_ids(
+                self._name, journal_entry_ids
             )
-            template_data = {
-                sample_data.name: (
-                    sample_data.value
-                    if not sample_data.field_id
-                    else entry._get_sample_data_by(sample_data, entry)
-                )
-                for sample_data in zns_sample_data
-            }
-
-            entry.send_zns_message(
-                {
-                    "phone": valid_phone_number,
-                    "template_id": zns_template.template_id,
-                    "template_data": json.dumps(template_data),
-                    "tracking_id": entry.id,
-                },
-                bool(phone),
+        )
+        journal_entry_ids = [
+            entry_id for entry_id in journal_entry_ids if entry_id not in queued_ids
+        ]
+
+        renderer = zns_template._get_renderer()
+        total_enqueued = 0
+        for entry_ids in split_every(chunk_size, journal_entry_ids):
+            journal_entries = self.env["account.move"].browse(entry_ids)
+            vals_list = journal_entries._prepare_zns_due_date_messages(
+                zns_template, renderer, testing_phone
             )
+            self.env["mv.zns.message.queue"]._enqueue(vals_list)
+            self.env.cr.commit()
+            total_enqueued += len(vals_list)
 
+        _logger.info(
+            f">>> {total_enqueued}/{len(journal_entry_ids)} ZNS messages enqueued <<<"
+        )
         return True
 
+    @staticmethod
+    def _sanitize_zns_phone(phone_number):
+        digits = "".join(filter(str.isdigit, phone_number or ""))
+        return digits if len(digits) in [10, 11] else False
+
+    def _prepare_zns_due_date_messages(self, zns_template, renderer, testing_phone=False):
+        """
+            Prepares the queued messages of the invoices: partners and phones are read
+            once, an invoice without a valid phone is skipped without failing the others.
+        :return: A list of values for "mv.zns.message.queue"
+        """
+        template_datas = renderer.render(self)
+        partner_by_entry = {
+            row["id"]: row["partner_id"] for row in self.read(["partner_id"], load=None)
+        }
+        phone_by_partner = {
+            row["id"]: row["phone"]
+            for row in self.env["res.partner"]
+            .browse(set(filter(None, partner_by_entry.values())))
+            .read(["phone"])
+        }
+
+        vals_list = []
+        for entry_id, partner_id in partner_by_entry.items():
+            try:
+                phone_number = testing_phone or self._sanitize_zns_phone(
+                    phone_by_partner.get(partner_id)
+                )
+                valid_phone_number = convert_valid_phone_number(phone_number)
+                if not valid_phone_number:
+                    _logger.warning(
+                        f"Invalid phone number for Invoice ID {entry_id}, ZNS message skipped."
+                    )
+                    continue
+
+                vals_list.append(
+                    {
+                        "res_model": self._name,
+                        "res_id": entry_id,
+                        "phone": valid_phone_number,
+                        "template_id": zns_template.id,
+                        "payload": ZNS_GET_PAYLOAD(
+                            valid_phone_number,
+                            zns_template.template_id,
+                            template_datas[entry_id],
+                            entry_id,
+                        ),
+                        "testing": bool(testing_phone),
+                    }
+                )
+            except Exception as e:
+                _logger.error(
+                    f"Failed to prepare the ZNS message of Invoice ID {entry_id}: {e}"
+                )
+        return vals_list
+
     # /// ZALO ZNS ///
 
     def send_zns_message(self, data, testing=False):
@@ -283,8 +342,14 @@ class AccountMove(models.Model):
             return
 
         # Process successful response
+        self._process_zns_response_data(response_data, ZNSConfiguration, testing)
+
+    def _process_zns_response_data(
+        self, response_data, ZNSConfiguration, testing=False, mark_sent=True
+    ):
         if response_data.get("data"):
-            for r_data in response_data["data"]:
+            datas = response_data["data"]
+            for r_data in [datas] if isinstance(datas, dict) else datas:
                 sent_time = (
                     get_datetime(r_data["sent_time"]) if r_data["sent_time"] else ""
                 )
@@ -292,19 +357,30 @@ class AccountMove(models.Model):
                 zns_message = ZNS_GENERATE_MESSAGE(r_data, formatted_sent_time)
                 self.generate_zns_history(r_data, ZNSConfiguration)
                 self.message_post(body=Markup(zns_message))
-                self.zns_notification_sent = not testing
+                if mark_sent:
+                    self.zns_notification_sent = not testing
 
                 _logger.info(f"Send Message ZNS successfully for Invoice {self.name}!")
 
+    def _zns_queue_message_sent(self, message, response_data, ZNSConfiguration):
+        """Called by the ZNS queue worker once the message of the invoice is sent"""
+        self.ensure_one()
+        # The send state is written in bulk by _zns_queue_mark_sent()
+        self._process_zns_response_data(
+            response_data, ZNSConfiguration, testing=message.testing, mark_sent=False
+        )
+
+    def _zns_queue_mark_sent(self):
+        """Called by the ZNS queue worker at the end of a batch, for the sent invoices"""
+        self.write({"zns_notification_sent": True})
+
     def generate_zns_history(self, data, config_id=False):
         template_id = self._get_zns_payment_notification_template()
         if not template_id or template_id is None:
             _logger.error("ZNS Payment Notification Template not found.")
             return False
 
-        zns_template_id = self.env["zns.template"].search(
-            [("template_id", "=", template_id)], limit=1
-        )
+        zns_template_id = self.env["zns.template"]._get_by_template_id(template_id)
         zns_history_id = self.env["zns.history"].search(
             [("msg_id", "=", data.get("msg_id"))], limit=1
         )
@@ -417,9 +493,7 @@ class AccountMove(models.Model):
         return {"success": True, "details": "Message sent successfully"}
 
     def _retrieve_zns_configuration(self):
-        ZNSConfiguration = self.env["zalo.config"].search(
-            [("primary_settings", "=", True)], limit=1
-        )
+        ZNSConfiguration = self.env["zalo.config"]._get_primary_configuration()
         if not ZNSConfiguration:
             _logger.error("ZNS Configuration is not found!")
             return None
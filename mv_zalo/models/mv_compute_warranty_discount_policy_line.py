@@ -77,9 +77,7 @@ class MvComputeWarrantyDiscountPolicyLine(models.Model):
             _logger.error("ZNS Notification Template not found.")
             return
 
-        zns_template = self.env["zns.template"].search(
-            [("template_id", "=", template_id)], limit=1
-        )
+        zns_template = self.env["zns.template"]._get_by_template_id(template_id)
         if not zns_template:
             _logger.error(f"ZNS Template with ID {template_id} not found.")
             return
@@ -88,21 +86,11 @@ class MvComputeWarrantyDiscountPolicyLine(models.Model):
             f">>> ZNS Template: [{zns_template.template_id}] {zns_template.template_name} <<<"
         )
 
-        zns_sample_data = self.env["zns.template.sample.data"].search(
-            [("zns_template_id", "=", zns_template.id)]
-        )
-        if not zns_sample_data:
+        if not zns_template.sample_data_ids:
             _logger.error("ZNS Template Sample Data not found.")
             return
 
-        template_data_sample = {
-            sample_data.name: (
-                sample_data.value
-                if not sample_data.field_id
-                else self._get_sample_data_by(sample_data, self)
-            )
-            for sample_data in zns_sample_data
-        }
+        template_data_sample = zns_template._get_renderer().render(self)[self.id]
 
         # Extract data
         phone = convert_valid_phone_number(self.partner_phone)
@@ -153,9 +141,7 @@ class MvComputeWarrantyDiscountPolicyLine(models.Model):
                 )
 
     def _retrieve_zns_configuration(self):
-        ZNSConfiguration = self.env["zalo.config"].search(
-            [("primary_settings", "=", True)], limit=1
-        )
+        ZNSConfiguration = self.env["zalo.config"]._get_primary_configuration()
         if not ZNSConfiguration:
             _logger.error("ZNS Configuration is not found!")
             return None
@@ -167,9 +153,7 @@ class MvComputeWarrantyDiscountPolicyLine(models.Model):
             _logger.error("ZNS Notification Template not found.")
             return False
 
-        zns_template_id = self.env["zns.template"].search(
-            [("template_id", "=", template_id)], limit=1
-        )
+        zns_template_id = self.env["zns.template"]._get_by_template_id(template_id)
         zns_history_id = self.env["zns.history"].search(
             [("msg_id", "=", data.get("msg_id"))], limit=1
         )
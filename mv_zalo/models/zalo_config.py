@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models, tools
+
+
+class ZaloConfig(models.Model):
+    _inherit = "zalo.config"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        # Tokens are refreshed often, only a change of the primary settings matters
+        if "primary_settings" in vals or "active" in vals:
+            self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
+    @api.model
+    @tools.ormcache()
+    def _get_primary_configuration_id(self):
+        return self.search([("primary_settings", "=", True)], limit=1).id
+
+    @api.model
+    def _get_primary_configuration(self):
+        """Cached lookup of the primary ZNS Configuration"""
+        return self.browse(self._get_primary_configuration_id())
@@ -1,23 +1,64 @@
 # -*- coding: utf-8 -*-
 import json
 import logging
-import pprint
-import socket
+import random
 
 import requests
 from odoo.addons.biz_zalo_common.models.common import NAME_API
+from odoo.addons.mv_zalo.zalo_http import (
+    ZALO_CIRCUIT_BREAKER,
+    ZALO_HTTP_DEFAULT_TIMEOUT,
+    ZaloCircuitOpenError,
+    zalo_request,
+)
 
-from odoo import _, api, models
+from odoo import _, api, models, tools
 from odoo.exceptions import UserError
 
 _logger = logging.getLogger(__name__)
 
 NAME_API = dict(NAME_API)
 
+# all: every request, error: failed requests only, sampled: failed requests and
+# a sample of the others, none: no request log
+ZALO_LOG_LEVELS = ["all", "error", "sampled", "none"]
+
 
 class ZALOLogRequest(models.Model):
     _inherit = "zalo.log.request"
 
+    # /// ZALO HTTP ///
+
+    @api.model
+    def _get_http_timeout(self):
+        """(connect, read) timeouts of the Zalo API requests, in seconds"""
+        ICPSudo = self.env["ir.config_parameter"].sudo()
+        return (
+            float(
+                ICPSudo.get_param(
+                    "mv_zalo.http_connect_timeout", ZALO_HTTP_DEFAULT_TIMEOUT[0]
+                )
+            ),
+            float(
+                ICPSudo.get_param(
+                    "mv_zalo.http_read_timeout", ZALO_HTTP_DEFAULT_TIMEOUT[1]
+                )
+            ),
+        )
+
+    @api.model
+    def _configure_circuit_breaker(self):
+        ICPSudo = self.env["ir.config_parameter"].sudo()
+        ZALO_CIRCUIT_BREAKER.configure(
+            int(ICPSudo.get_param("mv_zalo.http_circuit_failure_threshold", 5)),
+            int(ICPSudo.get_param("mv_zalo.http_circuit_reset_timeout", 60)),
+        )
+
+    @api.model
+    def _zalo_http_request(self, method, url, **kwargs):
+        self._configure_circuit_breaker()
+        return zalo_request(method, url, timeout=self._get_http_timeout(), **kwargs)
+
     # /// ZALO ZNS (HANDLERS) ///
 
     def zns_prepare_request_data(self, api_url, method, **kwargs):
@@ -47,7 +88,7 @@ class ZALOLogRequest(models.Model):
     def zns_execute_request(self, request_data):
         """Execute the HTTP request and return the response."""
         try:
-            response = requests.request(
+            response = self._zalo_http_request(
                 request_data["method"],
                 request_data["url"],
                 params=request_data["params"],
@@ -123,6 +164,81 @@ class ZALOLogRequest(models.Model):
             result["error"] = str(e)
         return result
 
+    # /// ZALO REQUEST LOGS ///
+
+    @api.model
+    def _get_log_level(self):
+        ICPSudo = self.env["ir.config_parameter"].sudo()
+        log_level = ICPSudo.get_param("mv_zalo.zalo_log_level", "all")
+        return log_level if log_level in ZALO_LOG_LEVELS else "all"
+
+    @api.model
+    def _should_log_request(self, state):
+        log_level = self._get_log_level()
+        if log_level == "none":
+            return False
+        elif log_level == "error":
+            return state == "error"
+        elif log_level == "sampled":
+            ICPSudo = self.env["ir.config_parameter"].sudo()
+            sample_rate = float(ICPSudo.get_param("mv_zalo.zalo_log_sample_rate", 0.1))
+            return state == "error" or random.random() < sample_rate
+        return True
+
+    @api.model
+    def _log_request(self, vals):
+        """
+            Inserts the request log according to the log level. When the context holds
+            a "zalo_log_request_buffer" list, the values are buffered instead, to be
+            inserted in bulk by _create_log_requests() at the end of the batch.
+        :return: The created log, empty when skipped or buffered
+        """
+        if not self._should_log_request(vals.get("state")):
+            return self.browse()
+
+        log_buffer = self.env.context.get("zalo_log_request_buffer")
+        if log_buffer is not None:
+            log_buffer.append(vals)
+            return self.browse()
+        return self.sudo().create(vals)
+
+    @api.model
+    def _create_log_requests(self, vals_list):
+        if not vals_list:
+            return self.browse()
+        return self.sudo().create(vals_list)
+
+    def init(self):
+        tools.create_index(
+            self._cr, "zalo_log_request_create_date_index", self._table, ["create_date"]
+        )
+
+    @api.model
+    def _cron_prune_log_requests(self, batch_size=10000):
+        ICPSudo = self.env["ir.config_parameter"].sudo()
+        retention_days = int(ICPSudo.get_param("mv_zalo.zalo_log_retention_days", 30))
+        if retention_days <= 0:
+            return
+
+        # Deleted by chunks so that the table is not locked for the whole run
+        total = 0
+        while True:
+            self._cr.execute(
+                """
+                DELETE FROM zalo_log_request
+                WHERE id IN (SELECT id
+                             FROM zalo_log_request
+                             WHERE create_date < NOW() AT TIME ZONE 'UTC' - %s * INTERVAL '1 day'
+                             LIMIT %s)
+                """,
+                [retention_days, batch_size],
+            )
+            total += self._cr.rowcount
+            self.env.cr.commit()
+            if self._cr.rowcount < batch_size:
+                break
+        _logger.info("Pruned %s Zalo request logs older than %s days", total, retention_days)
+
     # /// ZALO ZNS (OVERRIDE) ///
 
     @api.model
@@ -139,38 +255,60 @@ class ZALOLogRequest(models.Model):
             value["payload"] = kwargs["payload"]
         if "params" in kwargs and kwargs["params"]:
             value["params"] = kwargs["params"]
-        self_obj = self.sudo().create(value)
-        data = json.loads(self_obj.payload) if not is_check else self_obj.payload
+
+        # [>] The log is only inserted once the response is known (see _log_request)
+        value = self._add_missing_default_values(value)
+        request_log = self.new(value)
+        data = json.loads(request_log.payload) if not is_check else request_log.payload
 
         try:
-            _logger.info(
-                "\n >>>>>>>>>> ZALO - BEGIN: event received <<<<<<<<<<<<<\n%s\n\n",
-                pprint.pformat(
-                    {
-                        "URL": self_obj.url,
-                        "headers": json.loads(self_obj.headers),
-                        "method": self_obj.method,
-                        "params": self_obj.params,
-                        "data": data,
-                    }
-                ),
+            _logger.debug(
+                "ZALO - Request %s %s, params: %s, data: %s",
+                request_log.method,
+                request_log.url,
+                request_log.params,
+                data,
             )
-            response = requests.request(
-                self_obj.method,
-                self_obj.url,
-                params=json.loads(self_obj.params),
+            response = self._zalo_http_request(
+                request_log.method,
+                request_log.url,
+                params=json.loads(request_log.params),
                 data=data.encode("utf-8") if isinstance(data, str) else data,
-                headers=json.loads(self_obj.headers),
+                headers=json.loads(request_log.headers),
             )
-            _logger.info(">>>>>> ZALO - END: event received <<<<<<<<<<<<<")
-        except (socket.gaierror, socket.error, socket.timeout) as error:
+        except (
+            ZaloCircuitOpenError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as error:
+            self._log_request(dict(value, error=str(error), state="error"))
             raise UserError(
                 _("A network error caused the failure of the job: %s", error)
             )
         except Exception as error:
             raise UserError(_(error))
 
-        return self_obj.handle_response(response, is_check=is_check)
+        return self._handle_response_values(response, value)
+
+    @api.model
+    def _handle_response_values(self, response, value):
+        if response.status_code == 200:
+            try:
+                response_json = response.json()
+            except ValueError as error:
+                self._log_request(dict(value, error=response.text, state="error"))
+                raise UserError(error)
+
+            state = "done"
+            if "error" in response_json and response_json["error"] != 0:
+                state = "error"
+            log = self._log_request(dict(value, message=response_json, state=state))
+            return log, response_json
+        else:
+            message = "Information from instances is incorrect!"
+            self._log_request(dict(value, error=response.text, state="error"))
+            _logger.error(response)
+            raise UserError(message)
 
     def handle_response(self, response, is_check=False):
         if response.status_code == 200:
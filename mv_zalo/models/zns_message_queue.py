@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import requests
+from odoo.addons.biz_zalo_common.models.common import CODE_ERROR_ZNS, NAME_API
+from odoo.addons.mv_zalo.zalo_http import (
+    ZALO_CIRCUIT_BREAKER,
+    ZaloCircuitOpenError,
+    zalo_request,
+)
+
+from odoo import _, api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+CODE_ERROR_ZNS = dict(CODE_ERROR_ZNS)
+NAME_API = dict(NAME_API)
+
+ZNS_QUEUE_STATES = [
+    ("pending", "Pending"),
+    ("sending", "Sending"),
+    ("done", "Sent"),
+    ("error", "Error"),
+    ("cancel", "Cancelled"),
+]
+
+
+def ZNS_POST_MESSAGE(url, headers, payload, timeout):
+    """
+    Sends one ZNS message, runs outside of the ORM (worker threads).
+    :return: A dict {"status_code", "data", "error", "circuit_open"}
+    """
+    try:
+        response = zalo_request(
+            "POST",
+            url,
+            timeout=timeout,
+            data=payload.encode("utf-8"),
+            headers=headers,
+        )
+    except ZaloCircuitOpenError as error:
+        # Nothing was sent, the message is not an attempt
+        return {
+            "status_code": None,
+            "data": None,
+            "error": str(error),
+            "circuit_open": True,
+        }
+    except requests.exceptions.RequestException as error:
+        return {
+            "status_code": None,
+            "data": None,
+            "error": str(error),
+            "circuit_open": False,
+        }
+
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    return {
+        "status_code": response.status_code,
+        "data": data,
+        "error": None,
+        "circuit_open": False,
+    }
+
+
+class ZNSMessageQueue(models.Model):
+    """
+    Outbound ZNS messages: records are enqueued by the business flows (e.g. the due
+    date notification of invoices) and sent later by the queue worker.
+    """
+
+    _name = "mv.zns.message.queue"
+    _description = _("ZNS Outbound Message Queue")
+    _order = "id"
+
+    res_model = fields.Char("Model", required=True, readonly=True, index=True)
+    res_id = fields.Many2oneReference(
+        "Record ID", model_field="res_model", required=True, readonly=True, index=True
+    )
+    phone = fields.Char(required=True, readonly=True)
+    template_id = fields.Many2one("zns.template", "ZNS Template", readonly=True)
+    payload = fields.Text(required=True, readonly=True)
+    testing = fields.Boolean(readonly=True)
+    state = fields.Selection(
+        ZNS_QUEUE_STATES, default="pending", required=True, readonly=True, index=True
+    )
+    attempt_count = fields.Integer(default=0, readonly=True)
+    next_attempt_date = fields.Datetime(readonly=True)
+    sent_date = fields.Datetime(readonly=True)
+    msg_id = fields.Char("ZNS Message ID", readonly=True)
+    daily_quota = fields.Integer(readonly=True)
+    remaining_quota = fields.Integer(readonly=True)
+    error = fields.Text(readonly=True)
+
+    # ==================================
+    # ENQUEUE Methods
+    # ==================================
+
+    @api.model
+    def _enqueue(self, vals_list):
+        """
+        :param vals_list: A list of dict with "res_model", "res_id", "phone", "payload"
+            (dict or JSON), and optionally "template_id", "testing"
+        :return: The queued messages
+        """
+        for vals in vals_list:
+            if not isinstance(vals["payload"], str):
+                vals["payload"] = json.dumps(vals["payload"])
+        return self.sudo().create(vals_list)
+
+    @api.model
+    def _get_queued_res_ids(
+        self, res_model, res_ids, states=("pending", "sending", "done")
+    ):
+        """:return: The ids among res_ids which already have a queued message"""
+        if not res_ids:
+            return []
+
+        self.flush_model(["res_model", "res_id", "state", "testing"])
+        self._cr.execute(
+            """
+            SELECT DISTINCT res_id
+            FROM mv_zns_message_queue
+            WHERE res_model = %s
+              AND res_id = ANY(%s)
+              AND state IN %s
+              AND NOT COALESCE(testing, FALSE)
+            """,
+            [res_model, list(res_ids), tuple(states)],
+        )
+        return [res_id for (res_id,) in self._cr.fetchall()]
+
+    # ==================================
+    # WORKER Methods
+    # ==================================
+
+    @api.model
+    def _get_queue_param(self, key, default):
+        ICPSudo = self.env["ir.config_parameter"].sudo()
+        return int(ICPSudo.get_param(f"mv_zalo.zns_queue_{key}", default))
+
+    @api.model
+    def _get_remaining_quota(self):
+        """The remaining daily quota of the OA, as answered by the last message sent today"""
+        last_sent = self.search(
+            [
+                ("state", "=", "done"),
+                ("sent_date", ">=", fields.Datetime.today()),
+                ("daily_quota", ">", 0),
+            ],
+            order="sent_date DESC, id DESC",
+            limit=1,
+        )
+        return last_sent.remaining_quota if last_sent else None
+
+    @api.model
+    def _claim_messages(self, limit):
+        self.flush_model()
+        self._cr.execute(
+            """
+            UPDATE mv_zns_message_queue
+            SET state = 'sending', write_date = NOW() AT TIME ZONE 'UTC'
+            WHERE id IN (SELECT id
+                         FROM mv_zns_message_queue
+                         WHERE state = 'pending'
+                           AND (next_attempt_date IS NULL OR next_attempt_date <= NOW() AT TIME ZONE 'UTC')
+                         ORDER BY id
+                         LIMIT %s FOR UPDATE SKIP LOCKED)
+            RETURNING id
+            """,
+            [limit],
+        )
+        message_ids = [message_id for (message_id,) in self._cr.fetchall()]
+        self.invalidate_model(["state"])
+        return self.browse(sorted(message_ids))
+
+    @api.model
+    def _release_stuck_messages(self):
+        # Messages left in "sending" by an interrupted worker are sent again
+        self._cr.execute(
+            """
+            UPDATE mv_zns_message_queue
+            SET state = 'pending'
+            WHERE state = 'sending'
+              AND write_date < NOW() AT TIME ZONE 'UTC' - INTERVAL '1 hour'
+            """
+        )
+
+    @api.model
+    def _cron_process_queue(self):
+        ZNSConfiguration = self.env["zalo.config"]._get_primary_configuration()
+        if not ZNSConfiguration:
+            _logger.error("ZNS Configuration is not found!")
+            return
+
+        self._release_stuck_messages()
+        batch_size = self._get_queue_param("batch_size", 100)
+        max_workers = self._get_queue_param("max_workers", 8)
+
+        url = ZNSConfiguration._get_sub_url_zns("/message/template")
+        headers = ZNSConfiguration._get_headers()
+        headers = headers if isinstance(headers, dict) else json.loads(headers or "{}")
+        LogRequest = self.env["zalo.log.request"]
+        LogRequest._configure_circuit_breaker()
+        timeout = LogRequest._get_http_timeout()
+
+        while True:
+            if ZALO_CIRCUIT_BREAKER.is_open():
+                _logger.warning("Zalo API is unavailable, the ZNS queue is paused.")
+                break
+
+            remaining_quota = self._get_remaining_quota()
+            if remaining_quota is not None and remaining_quota <= 0:
+                _logger.warning("ZNS daily quota of the OA is exhausted.")
+                break
+
+            limit = (
+                batch_size
+                if remaining_quota is None
+                else min(batch_size, remaining_quota)
+            )
+            messages = self._claim_messages(limit)
+            self.env.cr.commit()
+            if not messages:
+                break
+
+            # The request logs of the batch are inserted at once, at the end of the batch
+            log_buffer = []
+            sent_ids_by_model = defaultdict(list)
+            messages = messages.with_context(zalo_log_request_buffer=log_buffer)
+            payloads = {message.id: message.payload for message in messages}
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        ZNS_POST_MESSAGE, url, headers, payload, timeout
+                    ): message_id
+                    for message_id, payload in payloads.items()
+                }
+                # The results are processed by the cron thread, one commit per message
+                for future in as_completed(futures):
+                    message = messages.browse(futures[future])
+                    try:
+                        response_data = message._process_result(
+                            future.result(), ZNSConfiguration
+                        )
+                        self.env.cr.commit()
+                    except Exception as e:
+                        self.env.cr.rollback()
+                        _logger.error(f"Failed to process ZNS message {message.id}: {e}")
+                        continue
+
+                    # The message is sent already, a failure here must not resend it
+                    if response_data:
+                        try:
+                            message._notify_record(response_data, ZNSConfiguration)
+                            self.env.cr.commit()
+                            if not message.testing:
+                                sent_ids_by_model[message.res_model].append(message.res_id)
+                        except Exception as e:
+                            self.env.cr.rollback()
+                            _logger.error(
+                                f"Failed to notify the record of ZNS message {message.id}: {e}"
+                            )
+
+            LogRequest._create_log_requests(log_buffer)
+            self._mark_records_sent(sent_ids_by_model)
+            self.env.cr.commit()
+
+    @api.model
+    def _mark_records_sent(self, sent_ids_by_model):
+        # The send state of the records is written in bulk, once per batch
+        for res_model, res_ids in sent_ids_by_model.items():
+            records = self.env[res_model].browse(res_ids).exists()
+            if hasattr(records, "_zns_queue_mark_sent"):
+                records._zns_queue_mark_sent()
+
+    def _process_result(self, result, config):
+        """:return: The response data when the message is sent, False otherwise"""
+        self.ensure_one()
+        data = result["data"]
+
+        # The circuit breaker opened during the batch: the message is sent later
+        if result.get("circuit_open"):
+            self.write({"state": "pending"})
+            return False
+
+        self._log_request(result, config)
+
+        # Network or HTTP errors are retried later
+        if result["status_code"] != 200 or not data:
+            self._schedule_retry(
+                result["error"] or f"Status Code {result['status_code']}"
+            )
+            return False
+
+        # Errors answered by the ZNS API (invalid phone, template, ...) are not retried
+        if data.get("error") != 0:
+            error_message = CODE_ERROR_ZNS.get(str(data.get("error")), "Unknown error")
+            _logger.error(
+                f"ZNS Code Error: {data.get('error')}, Error Info: {error_message}"
+            )
+            self.write(
+                {
+                    "state": "error",
+                    "attempt_count": self.attempt_count + 1,
+                    "error": f"[{data.get('error')}] {error_message}",
+                }
+            )
+            return False
+
+        response_data = data.get("data") or {}
+        quota = response_data.get("quota") or {}
+        self.write(
+            {
+                "state": "done",
+                "attempt_count": self.attempt_count + 1,
+                "sent_date": fields.Datetime.now(),
+                "msg_id": response_data.get("msg_id"),
+                "daily_quota": int(quota.get("dailyQuota") or 0),
+                "remaining_quota": int(quota.get("remainingQuota") or 0),
+                "error": False,
+            }
+        )
+        return data
+
+    def _notify_record(self, response_data, config):
+        self.ensure_one()
+        record = self.env[self.res_model].browse(self.res_id).exists()
+        if record and hasattr(record, "_zns_queue_message_sent"):
+            record._zns_queue_message_sent(self, response_data, config)
+
+    def _schedule_retry(self, error):
+        self.ensure_one()
+        max_attempts = self._get_queue_param("max_attempts", 5)
+        attempt_count = self.attempt_count + 1
+        if attempt_count >= max_attempts:
+            self.write(
+                {"state": "error", "attempt_count": attempt_count, "error": error}
+            )
+            return
+
+        # Exponential backoff: 5, 10, 20, 40... minutes
+        delay = self._get_queue_param("retry_delay", 5) * 2 ** (attempt_count - 1)
+        self.write(
+            {
+                "state": "pending",
+                "attempt_count": attempt_count,
+                "next_attempt_date": fields.Datetime.now() + timedelta(minutes=delay),
+                "error": error,
+            }
+        )
+
+    def _log_request(self, result, config):
+        self.ensure_one()
+        url = config._get_sub_url_zns("/message/template")
+        has_error = bool(
+            result["status_code"] != 200
+            or not result["data"]
+            or result["data"].get("error") != 0
+        )
+        self.env["zalo.log.request"]._log_request(
+            {
+                "url": url,
+                "name": NAME_API.get(url, ""),
+                "method": "POST",
+                "user_id": self._uid,
+                "payload": self.payload,
+                "message": result["data"] if not has_error else False,
+                "error": (result["data"] or result["error"]) if has_error else False,
+                "state": "error" if has_error else "done",
+            }
+        )
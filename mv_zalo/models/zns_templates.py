@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 import logging
 
-from odoo import fields, models
+from odoo.addons.mv_zalo.zns_template_renderer import ZNSTemplateRenderer
+
+from odoo import api, fields, models, tools
 
 _logger = logging.getLogger(__name__)
 
@@ -28,3 +30,57 @@ class ZNSTemplates(models.Model):
 
     # === Fields OVERRIDE ===#
     use_type = fields.Selection(selection_add=MODELS_ZNS_USE_TYPE)
+
+    # /// COMPILED TEMPLATE RENDERER ///
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if "template_id" in vals or "active" in vals:
+            self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
+    @api.model
+    @tools.ormcache("template_id")
+    def _get_id_by_template_id(self, template_id):
+        return self.search([("template_id", "=", template_id)], limit=1).id
+
+    @api.model
+    def _get_by_template_id(self, template_id):
+        """Cached lookup of a ZNS Template by its Zalo "template_id" """
+        return self.browse(self._get_id_by_template_id(template_id)) if template_id else self
+
+    @tools.ormcache("self.id", "version")
+    def _get_compiled_renderer(self, version):
+        sample_data = [
+            {
+                "name": sample.name,
+                "value": sample.value,
+                "field_name": sample.field_id.name,
+                "field_type": sample.field_id.ttype,
+                "relation": sample.field_id.relation,
+                "sample_type": sample.type,
+            }
+            for sample in self.sample_data_ids
+        ]
+        return ZNSTemplateRenderer(self.id, sample_data)
+
+    def _get_renderer(self):
+        """
+            The compiled renderer of the template, cached per (template, version): the
+            latest write_date of the template and of its sample data, and the sample data
+            ids so that removing a sample data also changes the version.
+        """
+        self.ensure_one()
+        version = (
+            max([self.write_date] + self.sample_data_ids.mapped("write_date")),
+            tuple(sorted(self.sample_data_ids.ids)),
+        )
+        return self._get_compiled_renderer(version)
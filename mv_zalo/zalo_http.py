@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds
+ZALO_HTTP_DEFAULT_TIMEOUT = (5, 30)
+ZALO_HTTP_POOL_MAXSIZE = 16
+
+
+class ZaloCircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without calling the API while the Zalo circuit breaker is open"""
+
+
+class ZaloCircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive network/server errors, then lets a
+    single request go through every ``reset_timeout`` seconds until one succeeds.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def configure(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    def is_open(self):
+        with self._lock:
+            return bool(
+                self._opened_at
+                and time.monotonic() - self._opened_at < self.reset_timeout
+            )
+
+    def before_request(self):
+        with self._lock:
+            if not self._opened_at:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise ZaloCircuitOpenError(
+                    "Zalo API is unavailable, requests are suspended for a while."
+                )
+            # Half-open: let this request test the API
+            self._opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at:
+                _logger.info("Zalo API is available again, circuit closed.")
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold and not self._opened_at:
+                _logger.error(
+                    "Zalo API failed %s times in a row, circuit opened for %ss.",
+                    self._failures,
+                    self.reset_timeout,
+                )
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+
+ZALO_CIRCUIT_BREAKER = ZaloCircuitBreaker()
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_zalo_session():
+    """The keep-alive session of the current worker process"""
+    global _session, _session_pid
+    with _session_lock:
+        # Prefork workers must not share the sockets of their parent
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4, pool_maxsize=ZALO_HTTP_POOL_MAXSIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+def reset_zalo_http():
+    """Drops the pooled connections and closes the circuit (e.g. between tests)"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session, _session_pid = None, None
+    ZALO_CIRCUIT_BREAKER.reset()
+
+
+def zalo_request(method, url, timeout=ZALO_HTTP_DEFAULT_TIMEOUT, **kwargs):
+    """
+    ``requests.request`` through the pooled session, guarded by the circuit breaker.
+    Any URL can be used, so that a local mock HTTP server can stand for the Zalo API.
+    """
+    ZALO_CIRCUIT_BREAKER.before_request()
+    try:
+        response = get_zalo_session().request(method, url, timeout=timeout, **kwargs)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        ZALO_CIRCUIT_BREAKER.record_failure()
+        raise
+
+    if response.status_code >= 500:
+        ZALO_CIRCUIT_BREAKER.record_failure()
+    else:
+        ZALO_CIRCUIT_BREAKER.record_success()
+    return response
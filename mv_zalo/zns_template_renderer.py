@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def _format_date(value):
+    return value.strftime("%d/%m/%Y") if value else None
+
+
+def _format_number(value):
+    return str(value)
+
+
+def _format_string(value):
+    return value if value else None
+
+
+def _format_many2one(value):
+    return str(value) if value else None
+
+
+# (field type, sample type) => formatter, same rules as "_get_sample_data_by"
+ZNS_SAMPLE_DATA_FORMATTERS = {
+    ("date", "DATE"): _format_date,
+    ("datetime", "DATE"): _format_date,
+    ("float", "NUMBER"): _format_number,
+    ("integer", "NUMBER"): _format_number,
+    ("monetary", "NUMBER"): _format_number,
+    ("char", "STRING"): _format_string,
+    ("text", "STRING"): _format_string,
+    ("many2one", "STRING"): _format_many2one,
+}
+
+
+class ZNSTemplateRenderer:
+    """
+    Compiled template data of a ZNS Template: the sample data are resolved once into
+    constants and field accessors, then a whole recordset is rendered with one read.
+    """
+
+    def __init__(self, template_id, sample_data):
+        """
+        :param sample_data: A list of dict with "name", "value", "field_name",
+            "field_type", "relation" and "sample_type"
+        """
+        self.template_id = template_id
+        self.constants = {}
+        self.accessors = []
+        for sample in sample_data:
+            if not sample["field_name"]:
+                self.constants[sample["name"]] = sample["value"]
+                continue
+
+            formatter = ZNS_SAMPLE_DATA_FORMATTERS.get(
+                (sample["field_type"], sample["sample_type"])
+            )
+            if not formatter:
+                _logger.error(
+                    f"Unhandled field type: {sample['field_type']} or sample type: {sample['sample_type']}"
+                )
+            self.accessors.append(
+                (sample["name"], sample["field_name"], sample["relation"], formatter)
+            )
+        self.field_names = sorted({accessor[1] for accessor in self.accessors})
+
+    def render(self, records):
+        """:return: A dict {record_id: template_data}"""
+        if not self.field_names:
+            return {record.id: dict(self.constants) for record in records}
+
+        rows = records.read(self.field_names, load=None)
+
+        # Many2one fields are rendered with the "name" of the related records
+        relation_names = {}
+        for _name, field_name, relation, formatter in self.accessors:
+            if relation and formatter and field_name not in relation_names:
+                related_ids = {row[field_name] for row in rows if row[field_name]}
+                relation_names[field_name] = {
+                    related["id"]: related["name"]
+                    for related in records.env[relation]
+                    .browse(related_ids)
+                    .read(["name"])
+                }
+
+        result = {}
+        for row in rows:
+            template_data = dict(self.constants)
+            for name, field_name, relation, formatter in self.accessors:
+                value = row[field_name]
+                if relation:
+                    value = relation_names.get(field_name, {}).get(value)
+                try:
+                    template_data[name] = formatter(value) if formatter else None
+                except Exception as e:
+                    _logger.error(f"Error processing sample data for {field_name}: {e}")
+                    template_data[name] = None
+            result[row["id"]] = template_data
+        return result